@@ -2,6 +2,15 @@
 import os
 from flask import Flask, render_template
 from models import db
+from schema import SchemaDriftError, create_missing_indexes, is_current, schema_cli, upgrade
+import perf
+import conditional
+import streaming
+import replicas
+from partitioning import partitions_cli
+from hours_rollup import rollup_cli
+from replicas import replicas_cli
+from seed import seed_command
 from routes.divisions import bp as divisions_bp
 from routes.departments import bp as departments_bp
 from routes.buildings import bp as buildings_bp
@@ -15,6 +24,9 @@ from routes.hr.time_entries import bp as time_entries_bp
 from routes.hr.payroll import bp as payroll_bp
 from routes.project_management.project_stats import bp as project_stats_bp
 from routes.project_management.milestones import bp as milestones_bp
+from routes.search import bp as search_bp
+from routes.org import bp as org_bp
+from routes.reports import bp as reports_bp
 
 
 
@@ -22,11 +34,19 @@ def create_app():
     app = Flask(__name__)
 
     app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
+    app.config["SQLALCHEMY_BINDS"] = replicas.bind_config(os.getenv("DATABASE_REPLICA_URLS"))
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.secret_key = os.getenv("SECRET_KEY", "dev-secret-key")
+    app.config["N_PLUS_ONE_THRESHOLD"] = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+    app.logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+    app.config["SCHEMA_AUTO_UPGRADE"] = os.getenv("SCHEMA_AUTO_UPGRADE", "0") == "1"
 
 
     db.init_app(app)
+    replicas.init_app(app)
+    perf.init_app(app)
+    conditional.init_app(app)
+    streaming.init_app(app)
 
     # Register blueprints
     app.register_blueprint(divisions_bp)
@@ -42,14 +62,36 @@ def create_app():
     app.register_blueprint(payroll_bp)
     app.register_blueprint(project_stats_bp)
     app.register_blueprint(milestones_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(org_bp)
+    app.register_blueprint(reports_bp)
 
 
     @app.route("/")
     def home():
         return render_template("home.html")
 
+    app.cli.add_command(seed_command)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(rollup_cli)
+    app.cli.add_command(replicas_cli)
+
+    @app.cli.command("create-indexes")
+    def create_indexes():
+        """Create any model indexes missing from an existing database."""
+        create_missing_indexes(db.engine)
+
+    # DDL runs once per deploy (`flask schema upgrade`); workers only read the stamp
     with app.app_context():
-        db.create_all()
+        if not is_current(db.engine):
+            if app.config["SCHEMA_AUTO_UPGRADE"]:
+                try:
+                    upgrade(db.engine)
+                except SchemaDriftError as exc:
+                    app.logger.error("%s", exc)
+            else:
+                app.logger.warning("Database schema is not up to date; run `flask --app app schema upgrade`")
 
     return app
 
@@ -0,0 +1,92 @@
+# benchmarks/bench_boot.py
+# Worker boot time and cold-start latency, with and without per-worker DDL.
+#
+#   python -m benchmarks.bench_boot [--workers 8] [--rounds 3] [--database-url URL]
+#
+# Each round starts --workers fresh Python processes at once (like a gunicorn
+# fleet restart). Every process imports app (create_app), then serves its first
+# request through the test client. "create_all" mode additionally runs
+# db.create_all() in each worker, which is what every worker did before the
+# schema stamp; "stamp" mode is the current boot, which only reads
+# Schema_Version. Without --database-url a seeded temporary SQLite file is used.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import make_app, quiet
+from models import db
+from seed import generate
+
+WORKER = r"""
+import json, sys, time
+started = time.perf_counter()
+from app import app
+from models import db
+booted = time.perf_counter()
+if sys.argv[1] == "create_all":
+    with app.app_context():
+        db.create_all()
+    booted = time.perf_counter()
+response = app.test_client().get("/employees/")
+response.get_data()
+served = time.perf_counter()
+print(json.dumps({"boot_ms": (booted - started) * 1000, "first_request_ms": (served - booted) * 1000,
+                  "status": response.status_code}))
+"""
+
+
+def run_round(mode, workers, env):
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER, mode], env=env, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Measure worker boot and cold-start latency.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--database-url", help="Benchmark an existing, already upgraded database.")
+    args = parser.parse_args(argv)
+
+    path = None
+    url = args.database_url
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+        app = make_app(url, routes=True)
+        with app.app_context():
+            generate(employees=1000, projects=100, time_entries=20000, months=3, echo=quiet)
+            db.session.remove()
+            db.engine.dispose()
+
+    env = dict(os.environ, DATABASE_URL=url, SCHEMA_AUTO_UPGRADE="0", LOG_LEVEL="WARNING")
+    try:
+        print(f"{'mode':<12} {'boot p50 ms':>12} {'boot max ms':>12} {'1st req p50':>12} {'1st req max':>12}")
+        for mode in ("create_all", "stamp"):
+            results = []
+            for _ in range(args.rounds):
+                results.extend(run_round(mode, args.workers, env))
+            boot = [r["boot_ms"] for r in results]
+            first = [r["first_request_ms"] for r in results]
+            print(
+                f"{mode:<12} {statistics.median(boot):>12.1f} {max(boot):>12.1f} "
+                f"{statistics.median(first):>12.1f} {max(first):>12.1f}"
+            )
+    finally:
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
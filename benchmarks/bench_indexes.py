@@ -0,0 +1,117 @@
+# benchmarks/bench_indexes.py
+# Compares query plans and latencies with and without the model indexes for
+# every route that filters on the indexed columns.
+#
+#   python -m benchmarks.bench_indexes [employees] [entries_per_employee]
+#
+# Each route is driven through the Flask test client. The SQL it issues is
+# captured and run again under EXPLAIN QUERY PLAN, first with every
+# secondary index dropped ("before") and then after schema.create_missing_indexes
+# ("after").
+import statistics
+import sys
+import time
+
+from sqlalchemy import delete, text
+
+from benchmarks.common import temp_app, count_queries, quiet
+from models import db, PayrollHistory, Project
+from schema import create_missing_indexes
+from seed import generate
+
+REPEAT = 5
+
+
+def routes():
+    # A project manager can't be deleted, so this POST only runs the blocker checks
+    manager = db.session.get(Project, 7).Manager_Emp_No
+    return [
+        ("payroll.run_payroll", "POST", "/payroll/run", {"Pay_Year": "2025", "Pay_Month": "3"}),
+        ("time_entries.list (employee)", "GET", "/time-entries/?employee=42", None),
+        ("time_entries.list (project)", "GET", "/time-entries/?project=7", None),
+        ("project_stats.stats", "GET", "/projects/7/stats", None),
+        ("milestones.list_milestones", "GET", "/projects/7/milestones", None),
+        ("employees.delete_employee (blocked)", "POST", f"/employees/{manager}/delete", None),
+    ]
+
+
+def drop_indexes():
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(conn, checkfirst=True)
+
+
+def explain(statement, parameters):
+    with db.engine.connect() as conn:
+        cursor = conn.connection.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def run_route(client, method, path, data):
+    if method == "GET":
+        return client.get(path)
+    return client.post(path, data=data)
+
+
+def measure(app, route_list):
+    client = app.test_client()
+    results = {}
+    for name, method, path, data in route_list:
+        timings = []
+        for _ in range(REPEAT):
+            with count_queries(db.engine) as statements:
+                started = time.perf_counter()
+                run_route(client, method, path, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            if name.startswith("payroll"):
+                db.session.execute(delete(PayrollHistory))
+                db.session.commit()
+
+        plans = [
+            detail
+            for statement, parameters in statements
+            if statement.lstrip().upper().startswith("SELECT")
+            for detail in explain(statement, parameters)
+        ]
+        results[name] = (statistics.median(timings), plans)
+    return results
+
+
+def main(argv):
+    employees = int(argv[0]) if argv else 20000
+    entries = int(argv[1]) if len(argv) > 1 else 25
+
+    with temp_app(routes=True) as app:
+        print(f"Seeding {employees} employees, {employees * entries} time entries...")
+        generate(
+            employees=employees,
+            projects=max(employees // 20, 7),
+            time_entries=employees * entries,
+            months=1,
+            end=(2025, 3),
+            echo=quiet,
+        )
+        route_list = routes()
+
+        drop_indexes()
+        before = measure(app, route_list)
+        create_missing_indexes(db.engine)
+        db.session.execute(text("ANALYZE"))
+        after = measure(app, route_list)
+
+    for name, *_ in route_list:
+        before_ms, before_plan = before[name]
+        after_ms, after_plan = after[name]
+        print(f"\n== {name}: {before_ms:.1f} ms -> {after_ms:.1f} ms")
+        print("  before:")
+        for line in before_plan:
+            print(f"    {line}")
+        print("  after:")
+        for line in after_plan:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,47 @@
+# benchmarks/bench_payroll.py
+# Measures how payroll_engine.run_payroll_period scales with headcount.
+#
+#   python -m benchmarks.bench_payroll [headcount ...]
+#
+# Each size gets a fresh SQLite file seeded with one month of history and
+# 20 time entries per employee. Reports SQL statements issued and wall time
+# per run.
+import sys
+import time
+
+from benchmarks.common import temp_app, count_queries, quiet
+from models import db
+from payroll_engine import run_payroll_period
+from seed import generate
+
+DEFAULT_SIZES = [1000, 5000, 20000]
+
+
+def bench(headcount):
+    with temp_app():
+        generate(
+            employees=headcount,
+            projects=max(headcount // 20, 1),
+            time_entries=headcount * 20,
+            months=1,
+            end=(2025, 3),
+            echo=quiet,
+        )
+        with count_queries(db.engine) as statements:
+            started = time.perf_counter()
+            created = run_payroll_period(2025, 3)
+            db.session.commit()
+            elapsed = time.perf_counter() - started
+        return created, len(statements), elapsed
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'headcount':>10} {'rows':>8} {'queries':>8} {'seconds':>9} {'rows/s':>10}")
+    for headcount in sizes:
+        created, queries, elapsed = bench(headcount)
+        print(f"{headcount:>10} {created:>8} {queries:>8} {elapsed:>9.3f} {created / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,210 @@
+# benchmarks/bench_routes.py
+# Drives every list/stats/payroll route through the Flask test client and
+# reports latency percentiles, SQL statement count (from perf's
+# X-DB-Query-Count header) and peak Python memory per request.
+#
+#   python -m benchmarks.bench_routes --employees 5000 --time-entries 500000 --out before.json
+#   python -m benchmarks.bench_routes --employees 5000 --time-entries 500000 --compare before.json
+#
+# Without --database-url a fresh SQLite file is seeded with seed.generate
+# (deterministic for the given sizes). With --database-url an already
+# seeded database is used as-is. Results are written as JSON tagged with the
+# current git commit so runs on different commits can be compared.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import delete, func, select
+
+from benchmarks.common import make_app, quiet
+from models import db, PayrollHistory, Project, Employee
+from seed import generate
+
+
+def routes(period):
+    year, month = period
+    project = db.session.execute(select(func.min(Project.Project_Number))).scalar()
+    employee = db.session.execute(select(func.min(Employee.Employee_No))).scalar()
+    return [
+        ("divisions.list", "GET", "/divisions/"),
+        ("departments.list", "GET", "/departments/"),
+        ("buildings.list", "GET", "/buildings/"),
+        ("rooms.list", "GET", "/rooms/"),
+        ("titles.list", "GET", "/titles/"),
+        ("employees.list", "GET", "/employees/"),
+        ("projects.list", "GET", "/projects/"),
+        ("projects.portfolio", "GET", "/projects/portfolio"),
+        ("project_stats.stats", "GET", f"/projects/{project}/stats"),
+        ("milestones.list", "GET", f"/projects/{project}/milestones"),
+        ("workson.list", "GET", "/workson/"),
+        ("project_employees.list", "GET", "/project-employees/"),
+        ("time_entries.list", "GET", "/time-entries/"),
+        ("time_entries.list (employee)", "GET", f"/time-entries/?employee={employee}"),
+        ("payroll.history", "GET", "/payroll/history"),
+        ("payroll.history (period)", "GET", f"/payroll/history?year={year}&month={month}"),
+        ("payroll.export_history (csv)", "GET", f"/payroll/history/export.csv?year={year}&month={month}"),
+        ("payroll.run_payroll", "POST", "/payroll/run"),
+    ]
+
+
+def _request(client, method, path, period):
+    if method == "POST":
+        year, month = period
+        response = client.post(path, data={"Pay_Year": str(year), "Pay_Month": str(month)})
+        if response.status_code == 302:
+            # Payroll runs as a background job: time it until the job finishes
+            while client.get(response.headers["Location"] + "/status").get_json()["status"] in ("queued", "running"):
+                time.sleep(0.01)
+    else:
+        response = client.get(path)
+    response.get_data()  # drain streamed bodies too
+    return response
+
+
+def _reset(name, period):
+    # Each payroll run must find the period empty again
+    if name == "payroll.run_payroll":
+        year, month = period
+        db.session.execute(
+            delete(PayrollHistory).where(PayrollHistory.Pay_Year == year, PayrollHistory.Pay_Month == month)
+        )
+        db.session.commit()
+
+
+def measure(app, route_list, period, iterations):
+    client = app.test_client()
+    results = {}
+    for name, method, path in route_list:
+        _reset(name, period)
+        _request(client, method, path, period)  # warm-up
+
+        timings = []
+        queries = None
+        for _ in range(iterations):
+            _reset(name, period)
+            started = time.perf_counter()
+            response = _request(client, method, path, period)
+            timings.append((time.perf_counter() - started) * 1000)
+            queries = response.headers.get("X-DB-Query-Count")
+
+        _reset(name, period)
+        tracemalloc.start()
+        _request(client, method, path, period)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        cuts = statistics.quantiles(timings, n=100, method="inclusive")
+        results[name] = {
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(cuts[94], 2),
+            "p99_ms": round(cuts[98], 2),
+            "queries": int(queries) if queries is not None else None,
+            "peak_kb": round(peak / 1024),
+            "status": response.status_code,
+        }
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results, baseline=None):
+    header = f"{'route':<32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KB':>9}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    for name, r in results.items():
+        line = (
+            f"{name:<32} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+            f"{r['queries'] if r['queries'] is not None else '-':>8} {r['peak_kb']:>9}"
+        )
+        base = (baseline or {}).get(name)
+        if base:
+            change = (r["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100 if base["p50_ms"] else 0
+            line += f" {change:>+11.1f}%"
+        print(line)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark list/stats/payroll routes.")
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--time-entries", type=int, default=200000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--database-url", help="Benchmark an existing, already seeded database.")
+    parser.add_argument("--out", help="Write results as JSON.")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against.")
+    args = parser.parse_args(argv)
+
+    end = (2025, 6)
+    path = None
+    url = args.database_url
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+
+    try:
+        app = make_app(url, routes=True)
+        app.logger.setLevel("WARNING")  # keep perf's per-request lines out of the report
+        with app.app_context():
+            if path:
+                started = time.perf_counter()
+                generate(
+                    employees=args.employees,
+                    projects=args.projects,
+                    time_entries=args.time_entries,
+                    months=args.months,
+                    end=end,
+                    payroll=True,
+                    echo=quiet,
+                )
+                print(f"Seeded in {time.perf_counter() - started:.1f}s")
+            else:
+                end = db.session.execute(
+                    select(PayrollHistory.Pay_Year, PayrollHistory.Pay_Month)
+                    .order_by(PayrollHistory.Pay_Year.desc(), PayrollHistory.Pay_Month.desc())
+                    .limit(1)
+                ).first() or end
+
+            results = measure(app, routes(tuple(end)), tuple(end), args.iterations)
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        if path:
+            os.remove(path)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["routes"]
+    report(results, baseline)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "sizes": {
+                    "employees": args.employees,
+                    "projects": args.projects,
+                    "time_entries": args.time_entries,
+                    "months": args.months,
+                } if path else {"database_url": "external"},
+                "iterations": args.iterations,
+                "routes": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,102 @@
+# benchmarks/bench_streaming.py
+# Time to first byte, total time and peak RSS of the big unpaginated list
+# pages, buffered (render_template over .all()) vs streamed (streaming.py).
+#
+#   python -m benchmarks.bench_streaming [--employees 50000] [--rounds 3] [--database-url URL]
+#
+# Every measurement runs in a fresh process so peak RSS (ru_maxrss) belongs to
+# that one request: the process boots the app, serves a small warm-up page,
+# then reads the list page chunk by chunk through the test client. Without
+# --database-url a temporary SQLite file is seeded with seed.generate.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import make_app, quiet
+from models import db
+from seed import generate
+
+PAGES = [
+    ("employees.list", "/employees/"),
+    ("workson.list", "/workson/"),
+    ("project_employees.list", "/project-employees/"),
+]
+
+WORKER = r"""
+import json, resource, sys, time
+from app import app
+client = app.test_client()
+client.get("/divisions/").get_data()
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+response = client.get(sys.argv[1], buffered=False)
+chunks = iter(response.response)
+first = next(chunks, b"")
+ttfb = time.perf_counter() - started
+size = len(first) + sum(len(chunk) for chunk in chunks)
+total = time.perf_counter() - started
+response.close()
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"ttfb_ms": ttfb * 1000, "total_ms": total * 1000, "bytes": size,
+                  "peak_rss_kb": rss_after, "rss_growth_kb": rss_after - rss_before,
+                  "status": response.status_code}))
+"""
+
+
+def run(path, stream, env):
+    env = dict(env, STREAM_LISTS="1" if stream else "0")
+    out = subprocess.run(
+        [sys.executable, "-c", WORKER, path], env=env, stdout=subprocess.PIPE, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compare buffered and streamed rendering of list pages.")
+    parser.add_argument("--employees", type=int, default=50000)
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--database-url", help="Benchmark an existing, already seeded database.")
+    args = parser.parse_args(argv)
+
+    path = None
+    url = args.database_url
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+        app = make_app(url, routes=True)
+        with app.app_context():
+            # Time entries are paginated and irrelevant here; keep seeding quick
+            generate(employees=args.employees, projects=args.projects, time_entries=1000, months=1, echo=quiet)
+            db.session.remove()
+            db.engine.dispose()
+
+    env = dict(os.environ, DATABASE_URL=url, SCHEMA_AUTO_UPGRADE="0", LOG_LEVEL="WARNING")
+    try:
+        print(
+            f"{'page':<24} {'mode':<10} {'TTFB ms':>9} {'total ms':>9} {'KB sent':>9} "
+            f"{'RSS growth KB':>14} {'peak RSS KB':>12}"
+        )
+        for name, page in PAGES:
+            for stream in (False, True):
+                results = [run(page, stream, env) for _ in range(args.rounds)]
+                print(
+                    f"{name:<24} {'streamed' if stream else 'buffered':<10} "
+                    f"{statistics.median(r['ttfb_ms'] for r in results):>9.1f} "
+                    f"{statistics.median(r['total_ms'] for r in results):>9.1f} "
+                    f"{results[0]['bytes'] // 1024:>9} "
+                    f"{statistics.median(r['rss_growth_kb'] for r in results):>14.0f} "
+                    f"{max(r['peak_rss_kb'] for r in results):>12}"
+                )
+    finally:
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,58 @@
+# benchmarks/common.py
+# Shared setup for the benchmark scripts: a throwaway SQLite app (optionally
+# with every blueprint) and a query recorder. Data comes from seed.generate.
+import os
+import tempfile
+from contextlib import contextmanager
+
+from flask import Flask
+from sqlalchemy import event
+
+from models import db
+from schema import upgrade
+
+
+def make_app(url, routes=False):
+    if routes:
+        # The real app factory, with every blueprint registered
+        os.environ["DATABASE_URL"] = url
+        os.environ.setdefault("SCHEMA_AUTO_UPGRADE", "1")
+        from app import create_app
+        return create_app()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+@contextmanager
+def temp_app(routes=False):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app = make_app(f"sqlite:///{path}", routes=routes)
+    try:
+        with app.app_context():
+            upgrade(db.engine)
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.remove(path)
+
+
+@contextmanager
+def count_queries(engine):
+    # Collects (statement, parameters) for every cursor execution
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def quiet(*args, **kwargs):
+    pass
@@ -0,0 +1,58 @@
+# bulk_load.py
+# Fast loading of many rows into one table: COPY ... FROM STDIN on Postgres,
+# batched executemany everywhere else. Neither path goes through the ORM, so
+# mapper events and flush hooks do not fire; callers are responsible for any
+# summaries that depend on the table (cache versions are bumped here).
+import csv
+import io
+
+from sqlalchemy import insert
+
+import cache
+
+BATCH = 10000
+COPY_CHUNK = 100000
+
+
+def _chunks(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy(conn, table, columns, rows):
+    cols = ", ".join(f'"{c}"' for c in columns)
+    sql = f'COPY "{table.name}" ({cols}) FROM STDIN WITH (FORMAT csv)'
+    cursor = conn.connection.cursor()
+    try:
+        for chunk in _chunks(rows, COPY_CHUNK):
+            buf = io.StringIO()
+            csv.writer(buf).writerows(chunk)
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+    finally:
+        cursor.close()
+
+
+def load_rows(session, model, columns, rows, periods=None):
+    """
+    Insert an iterable of tuples (in `columns` order) in the session's
+    transaction. `periods`, a collection of (year, month) the caller may fill
+    while `rows` is consumed, limits the cache bump to those months.
+    """
+    table = model.__table__
+    conn = session.connection()
+
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        _copy(conn, table, columns, rows)
+    else:
+        stmt = insert(table)
+        for batch in _chunks(rows, BATCH):
+            conn.execute(stmt, [dict(zip(columns, row)) for row in batch])
+
+    cache.bump_session(session, [table.name], periods)
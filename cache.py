@@ -0,0 +1,351 @@
+# cache.py
+# Per-worker cache for derived and reference data, kept correct across
+# gunicorn workers by per-table versions stored in Table_Version.
+#
+# Every ORM write (flush) and every bulk insert/update/delete run through the
+# session rewrites the Version token of the affected tables once the
+# transaction has committed, in a short transaction of its own: bumping inside
+# the writer's transaction would hold the Table_Version row lock until commit
+# and serialize every writer to the same table. Each worker keeps a snapshot of
+# all tokens and re-reads it at most every CACHE_VERSION_TTL seconds
+# (immediately after its own commits), so in the steady state a cache hit
+# costs no database round trip.
+#
+# A bump that fails after the data has committed is logged and retried with
+# the worker's next bump; a bump lost with its worker is covered by
+# CACHE_MAX_AGE, after which every entry is recomputed regardless of versions.
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import chain
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select, update, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import db, TableVersion
+
+VERSION_TTL = float(os.getenv("CACHE_VERSION_TTL", "2"))
+MAX_AGE = float(os.getenv("CACHE_MAX_AGE", "300"))
+
+_entries = {}
+_snapshots = {}  # engine -> {"versions", "loaded_at"}; a replica's tokens describe only its own data
+_lock = threading.Lock()
+_unbumped = {}  # engine -> tables whose bump failed after commit, retried with the next one
+
+PENDING = "cache_pending"  # Connection.info key: tables written with Core, bumped after commit
+
+# Finer-grained tokens, bumped alongside the table's own, for caches of closed
+# periods that should survive writes to other periods:
+#   "<table>@YYYY-MM"  writes to rows of that month
+#   "<table>@*"        writes whose months are not known (bulk statements)
+#   "<table>.<column>" updates that may change that column
+# period_tables() lists the tokens a cached period depends on.
+PERIOD_COLUMNS = {
+    "Payroll_History": ("Pay_Year", "Pay_Month"),
+    "Time_Entry": ("Work_Date",),
+    "Time_Entry_Rollup": ("Work_Year", "Work_Month"),
+}
+WATCHED_COLUMNS = {
+    "Employee": ("Department_Name",),
+}
+
+
+def current_versions(fresh=False):
+    stmt = select(TableVersion.Table_Name, TableVersion.Version)
+    engine = db.session.get_bind(clause=stmt)
+    snapshot = _snapshots.get(engine)
+    if fresh or snapshot is None or time.monotonic() - snapshot["loaded_at"] > VERSION_TTL:
+        snapshot = {"versions": dict(db.session.execute(stmt).all()), "loaded_at": time.monotonic()}
+        _snapshots[engine] = snapshot
+    return snapshot["versions"]
+
+
+def period_key(table, year, month):
+    return f"{table}@{year:04d}-{month:02d}"
+
+
+def column_key(table, column):
+    return f"{table}.{column}"
+
+
+def period_tables(tables, year, month):
+    """Version tokens for one month of `tables`; tables without periods count as a whole."""
+    keys = []
+    for table in tables:
+        if table in PERIOD_COLUMNS:
+            keys += [f"{table}@*", period_key(table, year, month)]
+        else:
+            keys.append(table)
+    return keys
+
+
+def _coarse(table):
+    # Tokens a write with unknown months and columns invalidates
+    keys = [f"{table}@*"] if table in PERIOD_COLUMNS else []
+    return keys + [column_key(table, c) for c in WATCHED_COLUMNS.get(table, ())]
+
+
+def _period_of(values):
+    if len(values) == 1:
+        return (values[0].year, values[0].month) if values[0] is not None else None
+    return tuple(values) if None not in values else None
+
+
+def table_versions(tables, fresh=False):
+    versions = current_versions(fresh)
+    return tuple(versions.get(t) for t in tables)
+
+
+def table_stamps(tables):
+    """{Table_Name: (Version, Updated_At)} for `tables`, always read from the database."""
+    rows = db.session.execute(
+        select(TableVersion.Table_Name, TableVersion.Version, TableVersion.Updated_At)
+        .where(TableVersion.Table_Name.in_(list(tables)))
+    ).all()
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def _fresh(hit, versions):
+    return hit is not None and hit[0] == versions and time.monotonic() - hit[2] < MAX_AGE
+
+
+def cached(key, tables, compute):
+    # A transaction that has already written to one of the tables may see
+    # data newer than its version token; never cache from it.
+    if _written(db.session) & set(tables):
+        return compute()
+
+    versions = table_versions(tables)
+    hit = _entries.get(key)
+    if _fresh(hit, versions):
+        return hit[1]
+
+    value = compute()
+    with _lock:
+        _entries[key] = (versions, value, time.monotonic())
+    return value
+
+
+def cached_many(keys, tables, compute):
+    """
+    cached() for a batch: compute(missing_keys) -> {key: value} runs once for
+    every miss. `tables` may also be a function of the key, for entries that
+    each depend on their own tokens (see period_tables()).
+    """
+    tables_for = tables if callable(tables) else (lambda key: tables)
+    written = _written(db.session)
+    if any(written & set(tables_for(key)) for key in keys):
+        return compute(list(keys))
+
+    all_versions = current_versions()
+    found, missing, versions = {}, [], {}
+    for key in keys:
+        versions[key] = tuple(all_versions.get(t) for t in tables_for(key))
+        hit = _entries.get(key)
+        if _fresh(hit, versions[key]):
+            found[key] = hit[1]
+        else:
+            missing.append(key)
+
+    if missing:
+        now = time.monotonic()
+        computed = compute(missing)
+        with _lock:
+            for key in missing:
+                if key in computed:
+                    _entries[key] = (versions[key], computed[key], now)
+        found.update(computed)
+    return found
+
+
+def reference(model, order_by):
+    """All rows of a lookup table as detached Row objects, for form dropdowns."""
+    table = model.__table__
+    return cached(
+        ("reference", table.name),
+        [table.name],
+        lambda: db.session.execute(select(table).order_by(order_by)).all(),
+    )
+
+
+def _tables(tables):
+    return set(tables) - {TableVersion.__tablename__}
+
+
+def bump(conn, tables):
+    # Fresh random tokens (not counters) so a rolled-back bump can never be
+    # confused with a later committed one. Sorted to keep lock order stable.
+    now = datetime.utcnow()
+    dialect = conn.dialect.name
+    for name in sorted(tables):
+        values = {"Table_Name": name, "Version": uuid.uuid4().hex, "Updated_At": now}
+        if dialect in ("postgresql", "sqlite"):
+            ins = (postgresql if dialect == "postgresql" else sqlite).insert(TableVersion)
+            conn.execute(
+                ins.values(values).on_conflict_do_update(
+                    index_elements=["Table_Name"],
+                    set_={"Version": values["Version"], "Updated_At": now},
+                )
+            )
+        else:
+            result = conn.execute(
+                update(TableVersion).where(TableVersion.Table_Name == name).values(values)
+            )
+            if result.rowcount == 0:
+                conn.execute(insert(TableVersion).values(values))
+
+
+def bump_now(tables, engine=None):
+    """Bump versions in a transaction of their own; for data that is already committed."""
+    engine = engine or db.engine
+    with _lock:
+        tables = _tables(tables) | _unbumped.pop(engine, set())
+    if not tables:
+        return
+    try:
+        with engine.begin() as conn:
+            bump(conn, tables)
+    except Exception:
+        # The data is committed either way; don't fail the caller's request
+        logger = current_app.logger if has_app_context() else logging.getLogger(__name__)
+        logger.exception("Cache version bump failed for %s; retrying with the next one", sorted(tables))
+        with _lock:
+            _unbumped.setdefault(engine, set()).update(tables)
+    _snapshots.clear()
+
+
+def _keys(tables, periods=None):
+    keys = set()
+    for table in _tables(tables):
+        keys.add(table)
+        if periods is not None and table in PERIOD_COLUMNS:
+            keys.update(period_key(table, y, m) for y, m in periods)
+            keys.update(column_key(table, c) for c in WATCHED_COLUMNS.get(table, ()))
+        else:
+            keys.update(_coarse(table))
+    return keys
+
+
+def bump_session(session, tables, periods=None):
+    """
+    Bump versions once the session commits; call this after writes that bypass
+    the session. `periods` [(year, month)], when the caller knows them, limits
+    the bump to those months of tables in PERIOD_COLUMNS.
+    """
+    # One new token per table per transaction is enough: nobody else can see
+    # the writes before commit, and the bump after it covers all of them.
+    keys = _keys(tables, periods)
+    if keys:
+        session.info.setdefault("cache_bumped", set()).update(keys)
+
+
+def bump_connection(conn, tables, periods=None):
+    """bump_session() for Core writes on a bare connection (a session's, or one from begin())."""
+    keys = _keys(tables, periods)
+    if keys:
+        conn.info.setdefault(PENDING, set()).update(keys)
+
+
+@contextmanager
+def begin(engine=None):
+    """engine.begin() that applies bump_connection() bumps after it commits."""
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        yield conn
+        pending = conn.info.pop(PENDING, set())
+    bump_now(pending, engine)
+
+
+def _written(session):
+    """Tables the session's open transaction has written to."""
+    written = set(session.info.get("cache_bumped", ()))
+    for conn in session.info.get("cache_connections", ()):
+        written |= conn.info.get(PENDING, set())
+    return written
+
+
+def _flushed_keys(session, obj):
+    # The object's table plus the months (old and new) and watched columns it touched
+    table = obj.__table__.name
+    keys = {table}
+    state = inspect(obj)
+    columns = PERIOD_COLUMNS.get(table)
+    if columns:
+        histories = [state.attrs[c].history for c in columns]
+        for values in (
+            [h.deleted[0] if h.deleted else (h.unchanged or h.added or [None])[0] for h in histories],
+            [(h.added or h.unchanged or [None])[0] for h in histories],
+        ):
+            period = _period_of(values)
+            keys.add(period_key(table, *period) if period else f"{table}@*")
+    if obj not in session.new:
+        keys.update(
+            column_key(table, c) for c in WATCHED_COLUMNS.get(table, ())
+            if state.deleted or state.attrs[c].history.has_changes()
+        )
+    return keys
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed(session, flush_context):
+    keys = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if hasattr(obj, "__table__"):
+            keys |= _flushed_keys(session, obj)
+    keys = _tables(keys)
+    if keys:
+        session.info.setdefault("cache_bumped", set()).update(keys)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_bulk(orm_execute_state):
+    # Query.delete()/update() and insert()/update()/delete() statements run
+    # through session.execute() never show up in a flush. Callers that know
+    # the months a statement touches pass execution_options(cache_periods=...).
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        bump_session(
+            orm_execute_state.session,
+            {orm_execute_state.statement.table.name},
+            orm_execute_state.execution_options.get("cache_periods"),
+        )
+
+
+@event.listens_for(Session, "after_begin")
+def _track_connection(session, transaction, connection):
+    session.info.setdefault("cache_connections", set()).add(connection)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    if session.in_nested_transaction():
+        return
+    # The session's connections are still checked out here, so their pending
+    # sets belong to this transaction only
+    by_engine = {}
+    for conn in session.info.pop("cache_connections", ()):
+        by_engine.setdefault(conn.engine, set()).update(conn.info.pop(PENDING, ()))
+    bumped = session.info.pop("cache_bumped", None)
+    if bumped:
+        by_engine.setdefault(session.get_bind(), set()).update(bumped)
+    for engine, tables in by_engine.items():
+        # Our own writes are visible to us straight away (bump_now drops the snapshots)
+        bump_now(tables, engine)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_bump(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("cache_connections", None)
+        session.info.pop("cache_bumped", None)
+
+
+@event.listens_for(Engine, "rollback")
+def _forget_pending(conn):
+    conn.info.pop(PENDING, None)
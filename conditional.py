@@ -0,0 +1,88 @@
+# conditional.py
+# Conditional GET for read-only pages. The ETag is a hash of the URL and the
+# Table_Version tokens of every table the page reads (see cache.py), so a
+# request whose If-None-Match still matches gets a 304 after one small
+# primary-key query, without running the view's queries or rendering its
+# template. Last-Modified is the newest Updated_At of those tables.
+#
+# Tokens are read fresh on every request rather than from the per-worker
+# snapshot: a 304 based on a stale snapshot would hide another worker's write.
+import hashlib
+import os
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+import cache
+
+_SOURCE_EXTENSIONS = (".py", ".html", ".js", ".css")
+_SOURCE_DIRS = ("routes",)  # besides the top-level modules, templates and static files
+
+
+def _release(app):
+    # Code or template changes must change every ETag too. Without an explicit
+    # RELEASE_VERSION (set it in production), the newest source file's mtime
+    # stands in for one. Only the app's own files count: a virtualenv or
+    # node_modules under the root would be slow to walk and would change the
+    # ETags whenever a dependency is touched.
+    root = app.root_path
+    newest = max(
+        (os.path.getmtime(os.path.join(root, name)) for name in os.listdir(root) if name.endswith(".py")),
+        default=0.0,
+    )
+    tops = [os.path.join(root, d) for d in _SOURCE_DIRS]
+    tops += [os.path.join(root, app.template_folder), app.static_folder]
+    for top in tops:
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not d.startswith((".", "__"))]
+            for name in filenames:
+                if name.endswith(_SOURCE_EXTENSIONS):
+                    newest = max(newest, os.path.getmtime(os.path.join(dirpath, name)))
+    return str(newest)
+
+
+def etag(tables):
+    """Decorator: answer If-None-Match / If-Modified-Since for a view that only reads `tables`."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            stamps = cache.table_stamps(tables)
+            digest = hashlib.sha1(current_app.config["RELEASE_VERSION"].encode())
+            digest.update(request.full_path.encode())
+            for table in tables:
+                digest.update(f"|{table}={stamps.get(table, (None, None))[0]}".encode())
+            tag = digest.hexdigest()
+
+            updated = [at for _, at in stamps.values() if at is not None]
+            last_modified = max(updated).replace(tzinfo=timezone.utc, microsecond=0) if updated else None
+
+            if request.if_none_match:
+                unchanged = request.if_none_match.contains(tag)
+            else:
+                unchanged = (
+                    last_modified is not None
+                    and request.if_modified_since is not None
+                    and last_modified <= request.if_modified_since
+                )
+            if unchanged:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(tag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Browsers revalidate on every load instead of guessing freshness
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapped
+
+    return decorator
+
+
+def init_app(app):
+    app.config.setdefault("RELEASE_VERSION", os.getenv("RELEASE_VERSION") or _release(app))
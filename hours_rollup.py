@@ -0,0 +1,219 @@
+# hours_rollup.py
+# Keeps Time_Entry_Rollup (hours and entry count per employee, project and
+# month) in step with Time_Entry, so payroll, project stats and reports never
+# re-scan raw time entries. ORM writes are tracked with mapper events that
+# apply +/- deltas in the same transaction, including moves between months or
+# projects. Bulk paths that bypass the ORM build deltas with add() and call
+# apply_deltas() themselves; rebuild()/check() repair and detect drift.
+# Every write here bumps the cache versions of the months it touched.
+#
+# project_summary imports this module before registering its own Time_Entry
+# listeners, so the rollup is already updated when Project_Stats reads it.
+from collections import defaultdict
+from decimal import Decimal
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, extract, func, insert, inspect, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+import cache
+from models import db, TimeEntry, TimeEntryRollup as Rollup
+
+KEY_COLUMNS = ("Employee_No", "Project_Number", "Work_Year", "Work_Month")
+CENT = Decimal("0.01")
+
+
+def new_deltas():
+    """{(Employee_No, Project_Number, year, month): [hours, entries]} accumulator."""
+    return defaultdict(lambda: [Decimal("0"), 0])
+
+
+def add(deltas, employee_no, project_number, work_date, hours, sign=1):
+    delta = deltas[(employee_no, project_number, work_date.year, work_date.month)]
+    delta[0] += sign * Decimal(str(hours or 0))
+    delta[1] += sign
+
+
+def project_hours(deltas):
+    """Collapse rollup deltas to {Project_Number: hours} for Project_Stats."""
+    hours = defaultdict(Decimal)
+    for (_, pn, _, _), (delta, _) in deltas.items():
+        hours[pn] += delta
+    return hours
+
+
+def apply_deltas(conn, deltas):
+    changes = [
+        dict(zip(KEY_COLUMNS, key), Hours=hours, Entry_Count=entries)
+        for key, (hours, entries) in deltas.items()
+        if hours or entries
+    ]
+    if not changes:
+        return
+
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = (postgresql if dialect == "postgresql" else sqlite).insert(Rollup)
+        conn.execute(
+            ins.on_conflict_do_update(
+                index_elements=list(KEY_COLUMNS),
+                set_={
+                    "Hours": Rollup.Hours + ins.excluded.Hours,
+                    "Entry_Count": Rollup.Entry_Count + ins.excluded.Entry_Count,
+                },
+            ),
+            changes,
+        )
+    else:
+        for change in changes:
+            result = conn.execute(
+                update(Rollup)
+                .where(*(getattr(Rollup, c) == change[c] for c in KEY_COLUMNS))
+                .values(Hours=Rollup.Hours + change["Hours"], Entry_Count=Rollup.Entry_Count + change["Entry_Count"])
+            )
+            if result.rowcount == 0:
+                conn.execute(insert(Rollup).values(change))
+
+    # Cells whose last entry went away
+    emptied = [tuple(c[k] for k in KEY_COLUMNS) for c in changes if c["Entry_Count"] < 0]
+    if emptied:
+        conn.execute(
+            delete(Rollup).where(
+                tuple_(*(getattr(Rollup, c) for c in KEY_COLUMNS)).in_(emptied),
+                Rollup.Entry_Count <= 0,
+            )
+        )
+    cache.bump_connection(conn, [Rollup.__tablename__], {(c["Work_Year"], c["Work_Month"]) for c in changes})
+
+
+def delete_rows(conn, employee_nos=None, project_numbers=None, months=None):
+    """Drop rollup rows alongside a bulk delete of the underlying time entries."""
+    stmt = delete(Rollup)
+    if employee_nos is not None:
+        stmt = stmt.where(Rollup.Employee_No.in_(employee_nos))
+    if project_numbers is not None:
+        stmt = stmt.where(Rollup.Project_Number.in_(project_numbers))
+    if months is not None:
+        stmt = stmt.where(tuple_(Rollup.Work_Year, Rollup.Work_Month).in_(list(months)))
+    conn.execute(stmt)
+    cache.bump_connection(conn, [Rollup.__tablename__], months)
+
+
+def _grouped():
+    year = extract("year", TimeEntry.Work_Date)
+    month = extract("month", TimeEntry.Work_Date)
+    return (
+        select(TimeEntry.Employee_No, TimeEntry.Project_Number, year, month, func.sum(TimeEntry.Hours), func.count())
+        .group_by(TimeEntry.Employee_No, TimeEntry.Project_Number, year, month)
+    )
+
+
+def is_empty(conn):
+    return conn.execute(select(Rollup.Employee_No).limit(1)).first() is None
+
+
+def rebuild(conn):
+    conn.execute(delete(Rollup))
+    conn.execute(insert(Rollup).from_select(list(KEY_COLUMNS) + ["Hours", "Entry_Count"], _grouped()))
+    cache.bump_connection(conn, [Rollup.__tablename__])
+    return conn.execute(select(func.count()).select_from(Rollup)).scalar()
+
+
+def check(conn):
+    """Return {key: (stored, expected)} for every rollup cell that has drifted."""
+    def cents(hours):
+        return Decimal(str(hours or 0)).quantize(CENT)
+
+    expected = {tuple(int(v) for v in row[:4]): (cents(row[4]), row[5]) for row in conn.execute(_grouped())}
+    stored = {
+        (r.Employee_No, r.Project_Number, r.Work_Year, r.Work_Month): (cents(r.Hours), r.Entry_Count)
+        for r in conn.execute(select(Rollup))
+    }
+    return {
+        key: (stored.get(key), expected.get(key))
+        for key in expected.keys() | stored.keys()
+        if stored.get(key) != expected.get(key)
+    }
+
+
+# ---- Readers ----
+
+def employee_hours(year, month):
+    """Subquery of (Employee_No, hours) for one month."""
+    return (
+        select(Rollup.Employee_No, func.sum(Rollup.Hours).label("hours"))
+        .where(Rollup.Work_Year == year, Rollup.Work_Month == month)
+        .group_by(Rollup.Employee_No)
+        .subquery()
+    )
+
+
+def project_hours_query(project_numbers=None):
+    """(Project_Number, hours) for every project, or only the given ones."""
+    q = select(Rollup.Project_Number, func.sum(Rollup.Hours)).group_by(Rollup.Project_Number)
+    if project_numbers is not None:
+        q = q.where(Rollup.Project_Number.in_(project_numbers))
+    return q
+
+
+# ---- Time_Entry events ----
+
+def _old_value(target, attr):
+    history = inspect(target).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attr)
+
+
+@event.listens_for(TimeEntry, "after_insert")
+def _time_entry_inserted(mapper, connection, target):
+    deltas = new_deltas()
+    add(deltas, target.Employee_No, target.Project_Number, target.Work_Date, target.Hours)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(TimeEntry, "after_update")
+def _time_entry_updated(mapper, connection, target):
+    deltas = new_deltas()
+    add(
+        deltas,
+        _old_value(target, "Employee_No"),
+        _old_value(target, "Project_Number"),
+        _old_value(target, "Work_Date"),
+        _old_value(target, "Hours"),
+        sign=-1,
+    )
+    add(deltas, target.Employee_No, target.Project_Number, target.Work_Date, target.Hours)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(TimeEntry, "after_delete")
+def _time_entry_deleted(mapper, connection, target):
+    deltas = new_deltas()
+    add(deltas, target.Employee_No, target.Project_Number, target.Work_Date, target.Hours, sign=-1)
+    apply_deltas(connection, deltas)
+
+
+rollup_cli = AppGroup("hours-rollup", help="Employee x project x month hours rollup.")
+
+
+@rollup_cli.command("rebuild")
+def rebuild_command():
+    """Recompute Time_Entry_Rollup from Time_Entry (after backfills)."""
+    with cache.begin() as conn:
+        count = rebuild(conn)
+    click.echo(f"Rebuilt {count} rollup rows.")
+
+
+@rollup_cli.command("check")
+def check_command():
+    """Compare Time_Entry_Rollup with Time_Entry; exits 1 on drift."""
+    with db.engine.connect() as conn:
+        drift = check(conn)
+    for key, (stored, expected) in sorted(drift.items())[:50]:
+        click.echo(f"{dict(zip(KEY_COLUMNS, key))}: stored={stored} expected={expected}")
+    if drift:
+        click.echo(f"{len(drift)} rollup rows drifted; run 'flask hours-rollup rebuild'.")
+        raise SystemExit(1)
+    click.echo("Time_Entry_Rollup is consistent.")
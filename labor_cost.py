@@ -0,0 +1,205 @@
+# labor_cost.py
+# Actual labor cost per department and per project and month, for the budget
+# vs. actual report (routes/reports.py).
+#
+#   salaried cost  Payroll_History Gross_Pay of SALARY rows
+#   hourly cost    Time_Entry_Rollup hours x Project_Employee.Hourly_Rate
+#
+# Departments are charged for their own employees. Projects are charged the
+# hourly cost of the time logged on them plus a share of each salaried
+# employee's gross pay proportional to the hours they logged on the project
+# that month (a window sum over the employee's month); salaried time that was
+# never logged stays with the department only.
+#
+# Every figure comes from three grouped queries per batch of months. Months
+# before the current one are closed and cached per month, each against its own
+# period tokens (see cache.PERIOD_COLUMNS): a payroll run or a time entry only
+# invalidates the month it belongs to, so a report over years of history
+# recomputes little more than the open month. Department moves and hourly
+# rates restate every month and invalidate them all.
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import and_, case, func, select, tuple_
+
+import cache
+from models import db, Department, Employee, PayrollHistory, Project, ProjectEmployee, TimeEntryRollup as Rollup
+
+PERIOD_TABLES = ["Payroll_History", "Time_Entry_Rollup", "Time_Entry"]
+SHARED_TOKENS = [cache.column_key("Employee", "Department_Name"), "Project_Employee"]
+CENT = Decimal("0.01")
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _empty_month():
+    return {
+        "departments": defaultdict(lambda: {"salaried": Decimal("0"), "hourly": Decimal("0")}),
+        "projects": defaultdict(lambda: {"salaried": Decimal("0"), "hourly": Decimal("0")}),
+    }
+
+
+def _department_salaried(periods):
+    return (
+        select(Employee.Department_Name, PayrollHistory.Pay_Year, PayrollHistory.Pay_Month, func.sum(PayrollHistory.Gross_Pay))
+        .join(Employee, PayrollHistory.Employee_No == Employee.Employee_No)
+        .where(PayrollHistory.Rate_Type == "SALARY")
+        .where(tuple_(PayrollHistory.Pay_Year, PayrollHistory.Pay_Month).in_(periods))
+        .group_by(Employee.Department_Name, PayrollHistory.Pay_Year, PayrollHistory.Pay_Month)
+    )
+
+
+def _department_hourly(periods):
+    return (
+        select(Employee.Department_Name, Rollup.Work_Year, Rollup.Work_Month, func.sum(Rollup.Hours * ProjectEmployee.Hourly_Rate))
+        .join(ProjectEmployee, ProjectEmployee.Employee_No == Rollup.Employee_No)
+        .join(Employee, Rollup.Employee_No == Employee.Employee_No)
+        .where(tuple_(Rollup.Work_Year, Rollup.Work_Month).in_(periods))
+        .group_by(Employee.Department_Name, Rollup.Work_Year, Rollup.Work_Month)
+    )
+
+
+def _project_costs(periods):
+    # One row per rollup cell with the employee's total hours for that month
+    cells = (
+        select(
+            Rollup.Employee_No,
+            Rollup.Project_Number,
+            Rollup.Work_Year,
+            Rollup.Work_Month,
+            Rollup.Hours,
+            func.sum(Rollup.Hours).over(
+                partition_by=(Rollup.Employee_No, Rollup.Work_Year, Rollup.Work_Month)
+            ).label("month_hours"),
+            ProjectEmployee.Hourly_Rate,
+        )
+        .outerjoin(ProjectEmployee, ProjectEmployee.Employee_No == Rollup.Employee_No)
+        .where(tuple_(Rollup.Work_Year, Rollup.Work_Month).in_(periods))
+        .subquery()
+    )
+    salary = and_(
+        PayrollHistory.Employee_No == cells.c.Employee_No,
+        PayrollHistory.Pay_Year == cells.c.Work_Year,
+        PayrollHistory.Pay_Month == cells.c.Work_Month,
+        PayrollHistory.Rate_Type == "SALARY",
+    )
+    return (
+        select(
+            cells.c.Project_Number,
+            cells.c.Work_Year,
+            cells.c.Work_Month,
+            func.sum(case((cells.c.Hourly_Rate.isnot(None), cells.c.Hours * cells.c.Hourly_Rate), else_=0)),
+            func.sum(case(
+                (cells.c.month_hours > 0, PayrollHistory.Gross_Pay * cells.c.Hours / cells.c.month_hours),
+                else_=0,
+            )),
+        )
+        .select_from(cells)
+        .outerjoin(PayrollHistory, salary)
+        .group_by(cells.c.Project_Number, cells.c.Work_Year, cells.c.Work_Month)
+    )
+
+
+def compute_months(conn, periods):
+    """{(year, month): {"departments": {name: costs}, "projects": {number: costs}}}."""
+    months = {tuple(p): _empty_month() for p in periods}
+    if not periods:
+        return months
+    periods = list(months)
+
+    for dept, year, month, amount in conn.execute(_department_salaried(periods)):
+        months[(year, month)]["departments"][dept]["salaried"] += _money(amount)
+    for dept, year, month, amount in conn.execute(_department_hourly(periods)):
+        months[(year, month)]["departments"][dept]["hourly"] += _money(amount)
+    for pn, year, month, hourly, salaried in conn.execute(_project_costs(periods)):
+        months[(year, month)]["projects"][pn]["hourly"] += _money(hourly)
+        months[(year, month)]["projects"][pn]["salaried"] += _money(salaried)
+
+    # Plain dicts: cacheable and safe to share between requests
+    return {
+        p: {kind: {k: dict(v) for k, v in m[kind].items()} for kind in ("departments", "projects")}
+        for p, m in months.items()
+    }
+
+
+def monthly_costs(periods, today=None):
+    """compute_months() for `periods`, with closed months served from the cache."""
+    today = today or date.today()
+    closed = [p for p in periods if p < (today.year, today.month)]
+    open_ = [p for p in periods if p not in closed]
+
+    cached = cache.cached_many(
+        [("labor_cost",) + tuple(p) for p in closed],
+        lambda key: cache.period_tables(PERIOD_TABLES, *key[1:]) + SHARED_TOKENS,
+        lambda keys: {
+            ("labor_cost",) + p: costs
+            for p, costs in compute_months(db.session.connection(), [k[1:] for k in keys]).items()
+        },
+    )
+    months = {key[1:]: costs for key, costs in cached.items()}
+    months.update(compute_months(db.session.connection(), open_))
+    return months
+
+
+def first_year():
+    """Earliest year with payroll or logged hours, or None."""
+    years = [
+        db.session.execute(select(func.min(PayrollHistory.Pay_Year))).scalar(),
+        db.session.execute(select(func.min(Rollup.Work_Year))).scalar(),
+    ]
+    years = [y for y in years if y is not None]
+    return min(years) if years else None
+
+
+def _row(monthly, budget, spent):
+    budget = Decimal(str(budget)) if budget is not None else None
+    return {
+        "monthly": monthly,
+        "spent": spent,
+        "budget": budget,
+        "remaining": budget - spent if budget is not None else None,
+        "used_pct": round(100 * spent / budget, 1) if budget else None,
+    }
+
+
+def build_report(year, today=None, first=None):
+    """
+    Budget vs. actual for one year. Departments compare the year's cost with
+    their Budget; projects compare their cost to date (all earlier years
+    included) with theirs. `first` is first_year(), if the caller has it.
+    """
+    today = today or date.today()
+    periods = [(year, m) for m in range(1, 13) if (year, m) <= (today.year, today.month)]
+    first = first if first is not None else first_year()
+    earlier = [(y, m) for y in range(first, year) for m in range(1, 13)] if first is not None else []
+    months = monthly_costs(earlier + periods, today)
+
+    def total(costs):
+        return costs["salaried"] + costs["hourly"] if costs else Decimal("0")
+
+    departments = []
+    names = db.session.execute(select(Department.Department_Name, Department.Budget).order_by(Department.Department_Name)).all()
+    if any(None in months[p]["departments"] for p in periods):
+        names.append((None, None))  # employees without a department
+    for name, budget in names:
+        monthly = [total(months[p]["departments"].get(name)) for p in periods]
+        departments.append({"Department_Name": name, **_row(monthly, budget, sum(monthly, Decimal("0")))})
+
+    projects = []
+    for pn, dept, budget in db.session.execute(
+        select(Project.Project_Number, Project.Department_Name, Project.Budget).order_by(Project.Project_Number)
+    ):
+        monthly = [total(months[p]["projects"].get(pn)) for p in periods]
+        before = sum((total(months[p]["projects"].get(pn)) for p in earlier), Decimal("0"))
+        year_total = sum(monthly, Decimal("0"))
+        projects.append({
+            "Project_Number": pn,
+            "Department_Name": dept,
+            "year_total": year_total,
+            **_row(monthly, budget, before + year_total),
+        })
+
+    return {"year": year, "periods": periods, "departments": departments, "projects": projects}
@@ -71,6 +71,19 @@ class Employee(db.Model):
         nullable=True
     )
 
+    # Typeahead search on names (routes/search.py): trigrams serve ILIKE
+    # prefix and substring matches on Postgres; on SQLite a NOCASE index
+    # serves the case-insensitive LIKE prefix match.
+    __table_args__ = (
+        db.Index(
+            "ix_employee_name_trgm",
+            "Employee_Name",
+            postgresql_using="gin",
+            postgresql_ops={"Employee_Name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        db.Index("ix_employee_name_nocase", db.text('"Employee_Name" COLLATE NOCASE')).ddl_if(dialect="sqlite"),
+    )
+
 
 class Project(db.Model):
     __tablename__ = "Project"
@@ -90,6 +103,11 @@ class Project(db.Model):
         nullable=False
     )
 
+    __table_args__ = (
+        db.Index("ix_project_manager", "Manager_Emp_No"),
+        db.Index("ix_project_department", "Department_Name", "Project_Number"),
+    )
+
 
 class Room(db.Model):
     __tablename__ = "Room"
@@ -125,6 +143,11 @@ class Works_On(db.Model):
     Time_Spent = db.Column(db.Numeric(10, 2))
     Role = db.Column(db.String(100))
 
+    # The PK leads with Employee_No, so project-side lookups need their own index
+    __table_args__ = (
+        db.Index("ix_works_on_project", "Project_Number"),
+    )
+
 class ProjectEmployee(db.Model):
     __tablename__ = "Project_Employee"
     Employee_No = db.Column(db.Integer, db.ForeignKey("Employee.Employee_No"), primary_key=True)
@@ -133,6 +156,10 @@ class ProjectEmployee(db.Model):
     Start_Date = db.Column(db.Date, nullable=False)
     End_Date = db.Column(db.Date, nullable=True)
 
+    __table_args__ = (
+        db.Index("ix_project_employee_project", "Project_Number"),
+    )
+
 class TimeEntry(db.Model):
     __tablename__ = "Time_Entry"
     Time_Entry_ID = db.Column(db.Integer, primary_key=True)
@@ -141,6 +168,14 @@ class TimeEntry(db.Model):
     Work_Date = db.Column(db.Date, nullable=False)
     Hours = db.Column(db.Numeric(6, 2), nullable=False)
 
+    # Keyset pagination walks (Work_Date DESC, Time_Entry_ID DESC); the
+    # employee/project variants serve the filtered listing and payroll.
+    __table_args__ = (
+        db.Index("ix_time_entry_date_id", "Work_Date", "Time_Entry_ID"),
+        db.Index("ix_time_entry_employee_date", "Employee_No", "Work_Date", "Time_Entry_ID"),
+        db.Index("ix_time_entry_project_date", "Project_Number", "Work_Date", "Time_Entry_ID"),
+    )
+
 class PayrollHistory(db.Model):
     __tablename__ = "Payroll_History"
     Payroll_ID = db.Column(db.Integer, primary_key=True)
@@ -162,6 +197,29 @@ class PayrollHistory(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("Employee_No", "Pay_Year", "Pay_Month", name="uq_payroll_period"),
+        # The unique constraint leads with Employee_No; history pages walk by period
+        db.Index("ix_payroll_period", "Pay_Year", "Pay_Month", "Employee_No"),
+    )
+
+class PayrollJob(db.Model):
+    # One queued or finished payroll run (see payroll_jobs.py)
+    __tablename__ = "Payroll_Job"
+    Job_ID = db.Column(db.Integer, primary_key=True)
+    Pay_Year = db.Column(db.Integer, nullable=False)
+    Pay_Month = db.Column(db.Integer, nullable=False)
+
+    Status = db.Column(db.String(20), nullable=False, default="queued")  # queued, running, done, failed
+    Total = db.Column(db.Integer, nullable=True)
+    Processed = db.Column(db.Integer, nullable=False, default=0)
+    Error = db.Column(db.Text, nullable=True)
+
+    Created_At = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    Started_At = db.Column(db.DateTime, nullable=True)
+    Heartbeat_At = db.Column(db.DateTime, nullable=True)
+    Finished_At = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_payroll_job_status", "Status", "Pay_Year", "Pay_Month"),
     )
 
 class ProjectMilestone(db.Model):
@@ -173,3 +231,54 @@ class ProjectMilestone(db.Model):
     Status = db.Column(db.String(30), nullable=False, default="Not Started")
     Due_Date = db.Column(db.Date, nullable=True)
     Completed_Date = db.Column(db.Date, nullable=True)
+
+    # (Project_Number, Due_Date) serves the milestone list and total counts;
+    # the partial index keeps "completed" counts off the open milestones.
+    __table_args__ = (
+        db.Index("ix_milestone_project_due", "Project_Number", "Due_Date"),
+        db.Index(
+            "ix_milestone_project_completed",
+            "Project_Number",
+            postgresql_where=db.text("\"Status\" = 'Completed'"),
+            sqlite_where=db.text("\"Status\" = 'Completed'"),
+        ),
+    )
+
+class ProjectStats(db.Model):
+    # Summary maintained incrementally by project_summary.py
+    __tablename__ = "Project_Stats"
+    Project_Number = db.Column(db.Integer, db.ForeignKey("Project.Project_Number"), primary_key=True)
+    Team_Count = db.Column(db.Integer, nullable=False, default=0)
+    Total_Hours = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    Total_Milestones = db.Column(db.Integer, nullable=False, default=0)
+    Completed_Milestones = db.Column(db.Integer, nullable=False, default=0)
+
+class TimeEntryRollup(db.Model):
+    # Hours per employee, project and month, maintained incrementally by hours_rollup.py
+    __tablename__ = "Time_Entry_Rollup"
+    Employee_No = db.Column(db.Integer, db.ForeignKey("Employee.Employee_No"), primary_key=True)
+    Project_Number = db.Column(db.Integer, db.ForeignKey("Project.Project_Number"), primary_key=True)
+    Work_Year = db.Column(db.Integer, primary_key=True)
+    Work_Month = db.Column(db.Integer, primary_key=True)
+    Hours = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    Entry_Count = db.Column(db.Integer, nullable=False, default=0)
+
+    # The PK serves per-employee reads; payroll reads a month, stats read a project
+    __table_args__ = (
+        db.Index("ix_rollup_period", "Work_Year", "Work_Month", "Employee_No"),
+        db.Index("ix_rollup_project_period", "Project_Number", "Work_Year", "Work_Month"),
+    )
+
+class TableVersion(db.Model):
+    # One row per table, rewritten with a fresh token on every write (see cache.py)
+    __tablename__ = "Table_Version"
+    Table_Name = db.Column(db.String(64), primary_key=True)
+    Version = db.Column(db.String(32), nullable=False)
+    Updated_At = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class SchemaVersion(db.Model):
+    # Single row stamped by `flask schema upgrade` (see schema.py)
+    __tablename__ = "Schema_Version"
+    Id = db.Column(db.Integer, primary_key=True)
+    Version = db.Column(db.String(64), nullable=False)
+    Applied_At = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
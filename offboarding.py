@@ -0,0 +1,131 @@
+# offboarding.py
+# Bulk employee removal. Leadership blockers for the whole batch come from one
+# UNION ALL query; child rows in Works_On, Project_Employee, Time_Entry and
+# Payroll_History go with one set-based DELETE per table and chunk, all in the
+# caller's transaction. Employees that still lead something are skipped and
+# reported instead of failing the batch.
+from collections import defaultdict
+
+from sqlalchemy import String, cast, delete, func, literal, select, union_all
+
+from models import db, Employee, Project, Division, Department, Works_On, ProjectEmployee, TimeEntry, PayrollHistory
+import hours_rollup
+from project_summary import refresh_projects
+
+CHILD_MODELS = [Works_On, ProjectEmployee, TimeEntry, PayrollHistory]
+CHUNK = 1000  # employee numbers per IN list
+
+
+def _chunks(items, size=CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def select_employees(session, employee_nos=None, department=None):
+    """Employee_No -> Employee_Name for the requested numbers and/or department."""
+    stmt = select(Employee.Employee_No, Employee.Employee_Name)
+    if department:
+        stmt = stmt.where(Employee.Department_Name == department)
+    if employee_nos is None:
+        return dict(session.execute(stmt).all())
+
+    found = {}
+    for chunk in _chunks(sorted(set(employee_nos))):
+        found.update(session.execute(stmt.where(Employee.Employee_No.in_(chunk))).all())
+    return found
+
+
+def _departments_of(session, employee_nos):
+    # Employee_No -> (Employee_Name, Department_Name), for reporting requested
+    # numbers that exist outside the requested department
+    found = {}
+    stmt = select(Employee.Employee_No, Employee.Employee_Name, Employee.Department_Name)
+    for chunk in _chunks(employee_nos):
+        rows = session.execute(stmt.where(Employee.Employee_No.in_(chunk)))
+        found.update((n, (name, dept)) for n, name, dept in rows)
+    return found
+
+
+def find_blockers(session, employee_nos):
+    """Employee_No -> ["manages project 7", "heads division X", ...] in one query per chunk."""
+    blockers = defaultdict(list)
+    for chunk in _chunks(employee_nos):
+        roles = union_all(
+            select(Project.Manager_Emp_No, literal("manages project"), cast(Project.Project_Number, String))
+            .where(Project.Manager_Emp_No.in_(chunk)),
+            select(Division.Head_Emp_No, literal("heads division"), Division.Division_Name)
+            .where(Division.Head_Emp_No.in_(chunk)),
+            select(Department.Head_Emp_No, literal("heads department"), Department.Department_Name)
+            .where(Department.Head_Emp_No.in_(chunk)),
+        )
+        for emp_no, role, key in session.execute(roles):
+            blockers[emp_no].append(f"{role} {key}")
+    return blockers
+
+
+def _child_counts(session, employee_nos):
+    # {table name: {Employee_No: rows}} for the report
+    counts = {}
+    for model in CHILD_MODELS:
+        per_employee = counts.setdefault(model.__tablename__, {})
+        for chunk in _chunks(employee_nos):
+            per_employee.update(session.execute(
+                select(model.Employee_No, func.count())
+                .where(model.Employee_No.in_(chunk))
+                .group_by(model.Employee_No)
+            ).all())
+    return counts
+
+
+def offboard(session, employee_nos=None, department=None, dry_run=False):
+    """
+    Delete employees and everything that references them, except those still
+    in a leadership role. Returns one report dict per requested employee:
+    Employee_No, Employee_Name, status ("deleted", "blocked", "not found",
+    "not in department" or "would delete" on a dry run), reasons and deleted
+    child rows per table. The caller commits.
+    """
+    found = select_employees(session, employee_nos, department)
+    requested = sorted(set(employee_nos)) if employee_nos is not None else sorted(found)
+    elsewhere = _departments_of(session, [n for n in requested if n not in found]) if department else {}
+    blockers = find_blockers(session, sorted(found))
+    deletable = [n for n in sorted(found) if n not in blockers]
+    counts = _child_counts(session, deletable)
+
+    if deletable and not dry_run:
+        # Bulk deletes skip the ORM events, so remember which project summaries to refresh
+        affected_projects = set()
+        for chunk in _chunks(deletable):
+            affected_projects.update(session.execute(
+                select(Works_On.Project_Number).where(Works_On.Employee_No.in_(chunk))
+                .union(select(TimeEntry.Project_Number).where(TimeEntry.Employee_No.in_(chunk)))
+            ).scalars())
+            for model in CHILD_MODELS:
+                session.execute(
+                    delete(model).where(model.Employee_No.in_(chunk)),
+                    execution_options={"synchronize_session": False},
+                )
+            hours_rollup.delete_rows(session.connection(), employee_nos=chunk)
+            session.execute(
+                delete(Employee).where(Employee.Employee_No.in_(chunk)),
+                execution_options={"synchronize_session": False},
+            )
+        refresh_projects(session.connection(), sorted(affected_projects))
+
+    report = []
+    for emp_no in requested:
+        entry = {"Employee_No": emp_no, "Employee_Name": found.get(emp_no), "reasons": [], "rows": {}}
+        if emp_no in elsewhere:
+            entry["Employee_Name"], other = elsewhere[emp_no]
+            entry["status"] = "not in department"
+            entry["reasons"] = [f"works in {other}" if other else "has no department"]
+        elif emp_no not in found:
+            entry["status"] = "not found"
+        elif emp_no in blockers:
+            entry["status"] = "blocked"
+            entry["reasons"] = blockers[emp_no]
+        else:
+            entry["status"] = "would delete" if dry_run else "deleted"
+            entry["rows"] = {table: per_emp.get(emp_no, 0) for table, per_emp in counts.items()}
+        report.append(entry)
+    return report
@@ -0,0 +1,99 @@
+# org_summary.py
+# Division -> Department rollup of headcount, title salaries, room space and
+# budget for the org tree (routes/org.py). Four grouped queries, merged in
+# Python; the result is small (one node per department) and cached by the
+# caller against ORG_TABLES.
+#
+# Employees count toward their department, and through it the department's
+# division. Employees with a division but no department count toward that
+# division directly; employees with neither are reported as unassigned.
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from models import Division, Department, Employee, Employee_Title, Room
+
+ORG_TABLES = ["Division", "Department", "Employee", "Employee_Title", "Room"]
+TOTALS = ("Headcount", "Salary", "Square_Feet", "Room_Count", "Budget")
+
+
+def _totals():
+    return {"Headcount": 0, "Salary": Decimal("0"), "Square_Feet": 0, "Room_Count": 0, "Budget": Decimal("0")}
+
+
+def _add(into, values):
+    for key in TOTALS:
+        into[key] += values[key]
+
+
+def _head(emp_no, name):
+    return {"Employee_No": emp_no, "Employee_Name": name} if emp_no is not None else None
+
+
+def compute_tree(conn):
+    """{"divisions": [division node with "departments"], "unassigned": totals, "totals": totals}."""
+    divisions = {}
+    for name, head_no, head_name in conn.execute(
+        select(Division.Division_Name, Division.Head_Emp_No, Employee.Employee_Name)
+        .outerjoin(Employee, Division.Head_Emp_No == Employee.Employee_No)
+        .order_by(Division.Division_Name)
+    ):
+        divisions[name] = {
+            "Division_Name": name,
+            "Head": _head(head_no, head_name),
+            **_totals(),
+            "Direct": _totals(),  # employees in the division but in no department
+            "departments": [],
+        }
+
+    departments = {}
+    for name, division, budget, head_no, head_name in conn.execute(
+        select(
+            Department.Department_Name,
+            Department.Division_Name,
+            Department.Budget,
+            Department.Head_Emp_No,
+            Employee.Employee_Name,
+        )
+        .outerjoin(Employee, Department.Head_Emp_No == Employee.Employee_No)
+        .order_by(Department.Department_Name)
+    ):
+        node = {"Department_Name": name, "Division_Name": division, "Head": _head(head_no, head_name), **_totals()}
+        node["Budget"] = Decimal(str(budget or 0))
+        departments[name] = node
+
+    for dept, count, square_feet in conn.execute(
+        select(Room.Department_Name, func.count(), func.sum(Room.Square_Feet)).group_by(Room.Department_Name)
+    ):
+        if dept in departments:
+            departments[dept]["Room_Count"] = count
+            departments[dept]["Square_Feet"] = square_feet or 0
+
+    unassigned = _totals()
+    for dept, division, count, salary in conn.execute(
+        select(Employee.Department_Name, Employee.Division_Name, func.count(), func.sum(Employee_Title.Salary))
+        .outerjoin(Employee_Title, Employee.Title == Employee_Title.Title)
+        .group_by(Employee.Department_Name, Employee.Division_Name)
+    ):
+        if dept in departments:
+            target = departments[dept]
+        elif division in divisions:
+            target = divisions[division]["Direct"]
+        else:
+            target = unassigned
+        target["Headcount"] += count
+        target["Salary"] += Decimal(str(salary or 0))
+
+    for node in departments.values():
+        division = divisions.get(node["Division_Name"])
+        if division is not None:
+            division["departments"].append(node)
+            _add(division, node)
+
+    totals = _totals()
+    for division in divisions.values():
+        _add(division, division["Direct"])
+        _add(totals, division)
+    _add(totals, unassigned)
+
+    return {"divisions": list(divisions.values()), "unassigned": unassigned, "totals": totals}
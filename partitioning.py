@@ -0,0 +1,276 @@
+# partitioning.py
+# Optional monthly range partitioning of Time_Entry on Postgres.
+#
+#   flask --app app time-entry-partitions convert     # one-off, rewrites the table
+#   flask --app app time-entry-partitions ensure      # daily cron; also run by `schema upgrade`
+#   flask --app app time-entry-partitions archive 2023-12 [--drop]
+#
+# Archived partitions are detached and renamed Time_Entry_YYYY_MM_archived (or
+# dropped), so a later `ensure` can recreate that month for backdated entries.
+#
+# Partitions are named Time_Entry_YYYY_MM and cover [first of month, first of
+# next month). A Time_Entry_default partition catches rows for months that have
+# no partition yet; `ensure` moves them into a real partition. Month-window
+# queries (payroll, date-filtered lists) then prune down to one partition.
+#
+# Postgres requires the partition key in every unique constraint, so the
+# partitioned table's primary key is (Time_Entry_ID, Work_Date). IDs still come
+# from the original sequence. The model is unchanged, and on SQLite (or an
+# unconverted Postgres table) every command is a no-op and the app uses the
+# plain table.
+import re
+from datetime import date
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint
+
+import cache
+import hours_rollup
+from models import db, TimeEntry
+from payroll_backfill import parse_period
+from payroll_engine import month_bounds
+from project_summary import refresh_projects
+
+TABLE = TimeEntry.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+MONTHS_AHEAD = 3
+_PARTITION_NAME = re.compile(rf"^{TABLE}_(\d{{4}})_(\d{{2}})$")
+
+
+def partition_name(year, month):
+    return f"{TABLE}_{year:04d}_{month:02d}"
+
+
+def _next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _months(first, last):
+    while first <= last:
+        yield first
+        first = _next_month(*first)
+
+
+def is_partitioned(conn):
+    if conn.dialect.name != "postgresql":
+        return False
+    kind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": f'"{TABLE}"'},
+    ).scalar()
+    return kind == "p"
+
+
+def partitions(conn):
+    """{(year, month): partition name} for the monthly partitions attached to Time_Entry."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": f'"{TABLE}"'}).scalars()
+    found = {}
+    for name in names:
+        m = _PARTITION_NAME.match(name)
+        if m:
+            found[(int(m.group(1)), int(m.group(2)))] = name
+    return found
+
+
+def _bounds_sql(year, month):
+    start, end = month_bounds(year, month)
+    return f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def _upcoming(months_ahead, today=None):
+    today = today or date.today()
+    last = (today.year, today.month)
+    for _ in range(months_ahead):
+        last = _next_month(*last)
+    return _months((today.year, today.month), last)
+
+
+def create_partition(conn, year, month):
+    """
+    Attach the partition for one month. Rows for that month already sitting in
+    the default partition are moved into it first, since Postgres refuses to
+    attach a range the default partition still holds rows for.
+    """
+    name = partition_name(year, month)
+    start, end = month_bounds(year, month)
+    stranded = conn.execute(text(
+        f'SELECT count(*) FROM "{DEFAULT_PARTITION}" WHERE "Work_Date" >= :start AND "Work_Date" < :end'
+    ), {"start": start, "end": end}).scalar()
+
+    if not stranded:
+        conn.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES {_bounds_sql(year, month)}'))
+        return name
+
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)'))
+    conn.execute(text(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+        f'WHERE "Work_Date" >= :start AND "Work_Date" < :end RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ), {"start": start, "end": end})
+    conn.execute(text(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES {_bounds_sql(year, month)}'))
+    return name
+
+
+def ensure(conn, months_ahead=MONTHS_AHEAD, today=None):
+    """
+    Create every missing monthly partition from this month through
+    `months_ahead` months from now, plus one for each month with rows in the
+    default partition. Returns the names created; a no-op unless Time_Entry is
+    partitioned.
+    """
+    if not is_partitioned(conn):
+        return []
+
+    existing = partitions(conn)
+    created = [create_partition(conn, y, m) for y, m in _upcoming(months_ahead, today) if (y, m) not in existing]
+
+    # Backdated rows, and rows dated past the last partition, land in the
+    # default partition; only months that actually have rows get one, so a
+    # mistyped year does not create a partition for every month in between.
+    stray = conn.execute(text(
+        f'SELECT DISTINCT EXTRACT(YEAR FROM "Work_Date")::int, EXTRACT(MONTH FROM "Work_Date")::int '
+        f'FROM "{DEFAULT_PARTITION}"'
+    )).all()
+    created += [create_partition(conn, y, m) for y, m in sorted(stray)]
+    return created
+
+
+def convert(conn, months_ahead=MONTHS_AHEAD):
+    """
+    One-off rewrite of a plain Time_Entry table into a partitioned one, in the
+    caller's transaction. Takes an exclusive lock for the duration of the copy.
+    """
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError("Time_Entry partitioning requires PostgreSQL")
+    if is_partitioned(conn):
+        return False
+
+    legacy = f"{TABLE}_unpartitioned"
+    sequence = conn.execute(
+        text("SELECT pg_get_serial_sequence(:table, 'Time_Entry_ID')"), {"table": f'"{TABLE}"'}
+    ).scalar()
+
+    conn.execute(text(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE'))
+    conn.execute(text(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"'))
+    # LIKE keeps column types, NOT NULLs and the nextval() default on Time_Entry_ID
+    conn.execute(text(
+        f'CREATE TABLE "{TABLE}" (LIKE "{legacy}" INCLUDING DEFAULTS) PARTITION BY RANGE ("Work_Date")'
+    ))
+    conn.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT'))
+
+    months = set(_upcoming(months_ahead))
+    months.update(tuple(row) for row in conn.execute(text(
+        f'SELECT DISTINCT EXTRACT(YEAR FROM "Work_Date")::int, EXTRACT(MONTH FROM "Work_Date")::int FROM "{legacy}"'
+    )))
+    for year, month in sorted(months):
+        conn.execute(text(
+            f'CREATE TABLE "{partition_name(year, month)}" PARTITION OF "{TABLE}" FOR VALUES {_bounds_sql(year, month)}'
+        ))
+
+    conn.execute(text(f'INSERT INTO "{TABLE}" SELECT * FROM "{legacy}"'))
+    if sequence:
+        conn.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE}"."Time_Entry_ID"'))
+    conn.execute(text(f'DROP TABLE "{legacy}"'))
+
+    # Keys and indexes go on after the copy; indexes on the parent cascade to every partition
+    conn.execute(text(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY ("Time_Entry_ID", "Work_Date")'))
+    for fk in TimeEntry.__table__.foreign_key_constraints:
+        conn.execute(AddConstraint(fk))
+    for index in TimeEntry.__table__.indexes:
+        index.create(conn)
+    return True
+
+
+def _archived_name(conn, name):
+    # Frees the partition name, so `ensure` can create that month again when a
+    # backdated entry needs it; a month archived twice gets a numbered suffix
+    candidate, n = f"{name}_archived", 1
+    while conn.execute(text("SELECT to_regclass(:name)"), {"name": f'"{candidate}"'}).scalar() is not None:
+        n += 1
+        candidate = f"{name}_archived_{n}"
+    return candidate
+
+
+def archive(conn, before, drop=False):
+    """
+    Detach every monthly partition older than `before` (year, month). Detached
+    partitions stay behind as ordinary tables renamed Time_Entry_YYYY_MM_archived
+    unless `drop` is set. Their hours leave Time_Entry_Rollup and Project_Stats,
+    so both are updated; rows for those months still in the default partition
+    stay put.
+    """
+    if not is_partitioned(conn):
+        return []
+
+    old = sorted((ym, name) for ym, name in partitions(conn).items() if ym < before)
+    affected = set()
+    detached = []
+    for _, name in old:
+        affected.update(conn.execute(text(f'SELECT DISTINCT "Project_Number" FROM "{name}"')).scalars())
+        conn.execute(text(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"'))
+        if drop:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+            detached.append(name)
+        else:
+            archived = _archived_name(conn, name)
+            conn.execute(text(f'ALTER TABLE "{name}" RENAME TO "{archived}"'))
+            detached.append(archived)
+
+    if old:
+        hours_rollup.delete_rows(conn, months=[ym for ym, _ in old])
+        refresh_projects(conn, sorted(affected))
+        cache.bump_connection(conn, [TABLE, hours_rollup.Rollup.__tablename__])
+    return detached
+
+
+partitions_cli = AppGroup("time-entry-partitions", help="Monthly range partitions for Time_Entry (Postgres only).")
+
+
+def _require_postgres(conn):
+    if conn.dialect.name != "postgresql":
+        click.echo("Partitioning needs PostgreSQL; Time_Entry stays a plain table here.")
+        return False
+    return True
+
+
+@partitions_cli.command("convert")
+@click.option("--months-ahead", default=MONTHS_AHEAD, show_default=True)
+def convert_command(months_ahead):
+    """Rewrite Time_Entry as a partitioned table (locks it while copying)."""
+    with db.engine.begin() as conn:
+        if not _require_postgres(conn):
+            return
+        if convert(conn, months_ahead):
+            click.echo(f"Time_Entry partitioned into {len(partitions(conn))} monthly partitions.")
+        else:
+            click.echo("Time_Entry is already partitioned.")
+
+
+@partitions_cli.command("ensure")
+@click.option("--months-ahead", default=MONTHS_AHEAD, show_default=True)
+def ensure_command(months_ahead):
+    """Create missing monthly partitions; run daily."""
+    with db.engine.begin() as conn:
+        if not _require_postgres(conn):
+            return
+        created = ensure(conn, months_ahead)
+    click.echo(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else "."))
+
+
+@partitions_cli.command("archive")
+@click.argument("before")
+@click.option("--drop", is_flag=True, help="Drop detached partitions instead of keeping them as tables.")
+def archive_command(before, drop):
+    """Detach partitions for months before BEFORE (YYYY-MM)."""
+    with cache.begin() as conn:
+        if not _require_postgres(conn):
+            return
+        detached = archive(conn, parse_period(before), drop)
+    verb = "Dropped" if drop else "Detached"
+    click.echo(f"{verb} {len(detached)} partitions" + (f": {', '.join(detached)}" if detached else "."))
@@ -0,0 +1,58 @@
+# payroll_backfill.py
+# Runs payroll for a range of periods on a process pool. Work is split by
+# (Pay_Year, Pay_Month) and by Employee_No % shards; every task commits its own
+# transaction, so a crashed backfill can simply be rerun -- the anti-join and
+# uq_payroll_period skip whatever was already written.
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from payroll_engine import check_period, run_payroll_period
+
+ShardResult = namedtuple("ShardResult", "year month shard shards rows seconds")
+
+_engine = None
+
+
+def parse_period(value):
+    year_str, month_str = value.split("-")
+    year, month = int(year_str), int(month_str)
+    check_period(year, month)
+    return year, month
+
+
+def iter_periods(first, last):
+    year, month = first
+    while (year, month) <= last:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _init_worker(database_url):
+    # Each process opens its own engine; connections are never shared
+    # with the parent or with other workers.
+    global _engine
+    _engine = create_engine(database_url)
+
+
+def run_shard(year, month, shard, shards):
+    started = time.perf_counter()
+    with Session(_engine) as session:
+        rows = run_payroll_period(year, month, session=session, shard=(shard, shards))
+        session.commit()
+    return ShardResult(year, month, shard, shards, rows, time.perf_counter() - started)
+
+
+def run_backfill(database_url, first, last, shards=4, workers=4):
+    tasks = [
+        (year, month, shard, shards)
+        for year, month in iter_periods(first, last)
+        for shard in range(shards)
+    ]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(database_url,)) as pool:
+        futures = [pool.submit(run_shard, *task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
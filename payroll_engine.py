@@ -0,0 +1,130 @@
+# payroll_engine.py
+# Set-based payroll: one grouped SELECT finds every employee still unpaid for the
+# period (with their hours for the month, read from Time_Entry_Rollup), and one
+# bulk INSERT writes the rows.
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import func, select, insert, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, PayrollHistory, Employee, Employee_Title, ProjectEmployee
+import hours_rollup
+
+FED = Decimal("0.10")
+STATE = Decimal("0.05")
+OTHER = Decimal("0.03")
+CENT = Decimal("0.01")
+
+
+def check_period(year, month):
+    # Every path that writes Payroll_History goes through here: the /payroll/run
+    # form, payroll jobs, backfill and seed
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid pay month {month}.")
+    if not 1 <= year < 9999:
+        raise ValueError(f"Invalid pay year {year}.")
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
+
+
+def payroll_row(emp_no, year, month, gross, rate_type, base_rate):
+    federal = (gross * FED).quantize(CENT)
+    state = (gross * STATE).quantize(CENT)
+    other = (gross * OTHER).quantize(CENT)
+    net = (gross - federal - state - other).quantize(CENT)
+    return {
+        "Employee_No": emp_no,
+        "Pay_Year": year,
+        "Pay_Month": month,
+        "Gross_Pay": gross,
+        "Federal_Tax": federal,
+        "State_Tax": state,
+        "Other_Tax": other,
+        "Net_Pay": net,
+        "Rate_Type": rate_type,
+        "Base_Rate_Used": base_rate,
+    }
+
+
+def unpaid_employees_query(year, month, shard=None):
+    # Monthly hours come pre-summed from Time_Entry_Rollup
+    hours = hours_rollup.employee_hours(year, month)
+
+    # Anti-join: employees with no Payroll_History row for this period yet.
+    # Hourly contracts win over the title salary, as before.
+    q = (
+        select(
+            Employee.Employee_No,
+            Employee_Title.Salary,
+            ProjectEmployee.Hourly_Rate,
+            func.coalesce(hours.c.hours, 0).label("hours"),
+        )
+        .select_from(Employee)
+        .outerjoin(Employee_Title, Employee.Title == Employee_Title.Title)
+        .outerjoin(ProjectEmployee, ProjectEmployee.Employee_No == Employee.Employee_No)
+        .outerjoin(hours, hours.c.Employee_No == Employee.Employee_No)
+        .outerjoin(
+            PayrollHistory,
+            and_(
+                PayrollHistory.Employee_No == Employee.Employee_No,
+                PayrollHistory.Pay_Year == year,
+                PayrollHistory.Pay_Month == month,
+            ),
+        )
+        .where(PayrollHistory.Payroll_ID.is_(None))
+        .where(or_(ProjectEmployee.Employee_No.isnot(None), Employee_Title.Salary.isnot(None)))
+    )
+
+    # shard = (index, count): only employees whose number falls in that bucket
+    if shard is not None:
+        index, count = shard
+        q = q.where(Employee.Employee_No % count == index)
+
+    return q
+
+
+def build_payroll_rows(year, month, result_rows):
+    rows = []
+    for emp_no, salary, hourly_rate, total_hours in result_rows:
+        if hourly_rate is not None:
+            rate = Decimal(str(hourly_rate))
+            gross = (Decimal(str(total_hours)) * rate).quantize(CENT)
+            rows.append(payroll_row(emp_no, year, month, gross, "HOURLY", hourly_rate))
+        else:
+            gross = Decimal(str(salary))
+            rows.append(payroll_row(emp_no, year, month, gross, "SALARY", salary))
+    return rows
+
+
+def insert_payroll_rows(session, rows):
+    if not rows:
+        return
+
+    # uq_payroll_period keeps reruns idempotent: rows another run already wrote
+    # are skipped by the database instead of being checked one at a time.
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(PayrollHistory).on_conflict_do_nothing(constraint="uq_payroll_period")
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(PayrollHistory).on_conflict_do_nothing()
+    else:
+        stmt = insert(PayrollHistory)
+
+    # Only the periods written lose their cached summaries (see cache.PERIOD_COLUMNS)
+    periods = {(row["Pay_Year"], row["Pay_Month"]) for row in rows}
+    session.execute(stmt, rows, execution_options={"cache_periods": periods})
+
+
+def run_payroll_period(year, month, session=None, shard=None):
+    check_period(year, month)
+    session = session or db.session
+    result_rows = session.execute(unpaid_employees_query(year, month, shard)).all()
+    rows = build_payroll_rows(year, month, result_rows)
+    insert_payroll_rows(session, rows)
+    return len(rows)
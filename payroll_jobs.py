@@ -0,0 +1,152 @@
+# payroll_jobs.py
+# Payroll runs as background jobs. POST /payroll/run only records a Payroll_Job
+# row and hands its id to a small per-process thread pool. The worker pays the
+# period's unpaid employees CHUNK at a time and commits every chunk together
+# with the job's progress, so the UI can poll it and a killed worker loses at
+# most one chunk.
+#
+# Already-paid employees are skipped by the anti-join (and uq_payroll_period),
+# so a job whose heartbeat has gone stale can be claimed again and carries on
+# where it stopped. The status endpoint does that for jobs it finds abandoned;
+# `flask payroll resume-jobs` does it from the command line.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+
+from models import db, PayrollJob, Employee
+from payroll_engine import build_payroll_rows, check_period, insert_payroll_rows, unpaid_employees_query
+
+CHUNK = 500  # employees per transaction
+WORKERS = int(os.getenv("PAYROLL_JOB_WORKERS", "2"))
+STALE_AFTER = timedelta(seconds=int(os.getenv("PAYROLL_JOB_STALE_SECONDS", "120")))
+ACTIVE = ("queued", "running")
+
+_executor = None
+_lock = threading.Lock()
+
+
+def enqueue(session, year, month):
+    """The period's queued or running job, or a new queued one. The caller commits."""
+    check_period(year, month)
+    job = session.execute(
+        select(PayrollJob)
+        .where(PayrollJob.Pay_Year == year, PayrollJob.Pay_Month == month, PayrollJob.Status.in_(ACTIVE))
+        .order_by(PayrollJob.Job_ID)
+        .limit(1)
+    ).scalar()
+    if job is None:
+        job = PayrollJob(Pay_Year=year, Pay_Month=month, Status="queued", Processed=0)
+        session.add(job)
+        session.flush()
+    return job
+
+
+def submit(app, job_id):
+    """Run the job on this process's pool. Call after the job row is committed."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="payroll-job")
+    _executor.submit(run_job, app, job_id)
+
+
+def _claimable(now):
+    return or_(
+        PayrollJob.Status == "queued",
+        and_(PayrollJob.Status == "running", PayrollJob.Heartbeat_At < now - STALE_AFTER),
+    )
+
+
+def claim(session, job_id):
+    # Atomic: of several workers (or processes) handed the same job, one wins.
+    # A resumed job counts progress for this attempt only.
+    now = datetime.utcnow()
+    result = session.execute(
+        update(PayrollJob)
+        .where(PayrollJob.Job_ID == job_id, _claimable(now))
+        .values(Status="running", Started_At=now, Heartbeat_At=now, Processed=0, Total=None, Error=None),
+        execution_options={"synchronize_session": False},
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def _pay(session, job):
+    year, month = job.Pay_Year, job.Pay_Month
+    job.Total = session.execute(
+        select(func.count()).select_from(unpaid_employees_query(year, month).subquery())
+    ).scalar()
+    session.commit()
+
+    after = None
+    while True:
+        q = unpaid_employees_query(year, month).order_by(Employee.Employee_No).limit(CHUNK)
+        if after is not None:
+            q = q.where(Employee.Employee_No > after)
+        result_rows = session.execute(q).all()
+        if not result_rows:
+            break
+        insert_payroll_rows(session, build_payroll_rows(year, month, result_rows))
+        after = result_rows[-1][0]
+        job.Processed += len(result_rows)
+        job.Heartbeat_At = datetime.utcnow()
+        session.commit()
+
+
+def run_job(app, job_id):
+    with app.app_context():
+        session = db.session
+        if not claim(session, job_id):
+            return
+        job = session.get(PayrollJob, job_id)
+        try:
+            _pay(session, job)
+            job.Status = "done"
+        except Exception as exc:
+            app.logger.exception("Payroll job %s failed", job_id)
+            session.rollback()
+            job = session.get(PayrollJob, job_id)
+            job.Status = "failed"
+            job.Error = str(exc)
+        job.Finished_At = datetime.utcnow()
+        session.commit()
+
+
+def is_abandoned(job, now=None):
+    # Queued but never picked up (its process died), or running without a heartbeat
+    now = now or datetime.utcnow()
+    if job.Status == "queued":
+        return job.Created_At < now - STALE_AFTER
+    if job.Status == "running":
+        return job.Heartbeat_At is None or job.Heartbeat_At < now - STALE_AFTER
+    return False
+
+
+def resumable(session):
+    now = datetime.utcnow()
+    return session.execute(
+        select(PayrollJob.Job_ID).where(_claimable(now)).order_by(PayrollJob.Job_ID)
+    ).scalars().all()
+
+
+def progress(job, now=None):
+    now = now or datetime.utcnow()
+    elapsed = ((job.Finished_At or now) - job.Started_At).total_seconds() if job.Started_At else 0
+    rate = job.Processed / elapsed if elapsed > 0 and job.Processed else None
+    eta = None
+    if job.Status == "running" and rate and job.Total is not None:
+        eta = max(job.Total - job.Processed, 0) / rate
+    return {
+        "job_id": job.Job_ID,
+        "year": job.Pay_Year,
+        "month": job.Pay_Month,
+        "status": job.Status,
+        "processed": job.Processed,
+        "total": job.Total,
+        "rate": round(rate, 1) if rate else None,  # employees per second
+        "eta_seconds": round(eta) if eta is not None else None,
+        "error": job.Error,
+    }
@@ -0,0 +1,87 @@
+# perf.py
+# Per-request SQL accounting. Cursor events on every engine count statements
+# and DB time for the current Flask request and group them by fingerprint
+# (the SQL with literals and IN-lists collapsed). The totals go out as
+# response headers and one log line; a fingerprint repeated at least
+# N_PLUS_ONE_THRESHOLD times is reported as a likely N+1.
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    statement = _IN_LIST.sub("(?)", statement)
+    statement = _LITERAL.sub("?", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def _tracking():
+    return has_request_context() and "sql_stats" in g
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _tracking():
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None or not _tracking():
+        return
+    stats = g.sql_stats
+    stats["count"] += 1
+    stats["seconds"] += time.perf_counter() - started
+    stats["fingerprints"][fingerprint(statement)] += 1
+
+
+def _start_request():
+    g.sql_stats = {"count": 0, "seconds": 0.0, "fingerprints": Counter()}
+
+
+def _finish_request(response):
+    stats = g.pop("sql_stats", None)
+    if stats is None:
+        return response
+
+    threshold = current_app.config["N_PLUS_ONE_THRESHOLD"]
+    repeated = [(fp, n) for fp, n in stats["fingerprints"].most_common() if n >= threshold]
+    db_ms = stats["seconds"] * 1000
+
+    response.headers["X-DB-Query-Count"] = str(stats["count"])
+    response.headers["X-DB-Time-Ms"] = f"{db_ms:.1f}"
+    response.headers["Server-Timing"] = f"db;dur={db_ms:.1f}"
+    if repeated:
+        response.headers["X-DB-N-Plus-One"] = str(len(repeated))
+
+    current_app.logger.info(
+        "%s %s -> %s: %d queries, %.1f ms in DB",
+        request.method, request.path, response.status_code, stats["count"], db_ms,
+    )
+    for fp, n in repeated:
+        current_app.logger.warning(
+            "Possible N+1 on %s %s: statement ran %d times: %s",
+            request.method, request.path, n, fp,
+        )
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("N_PLUS_ONE_THRESHOLD", 10)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
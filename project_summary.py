@@ -0,0 +1,219 @@
+# project_summary.py
+# Keeps Project_Stats in step with Works_On, Time_Entry and Project_Milestone.
+# ORM writes are tracked with mapper events that apply +/- deltas inside the
+# same transaction; bulk statements that bypass the ORM call refresh_projects()
+# for the projects they touched. rebuild()/check() repair and detect drift.
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import event, func, select, insert, update, delete, case, inspect
+
+# Imported first so its Time_Entry listeners run before ours (see compute_stats)
+import hours_rollup
+from models import db, Project, ProjectStats, Works_On, TimeEntry, ProjectMilestone, Employee
+
+COUNTERS = ("Team_Count", "Total_Hours", "Total_Milestones", "Completed_Milestones")
+
+
+def compute_stats(conn, project_numbers=None):
+    """Recompute the counters from the base tables with one grouped query each.
+
+    Hours come from Time_Entry_Rollup rather than raw Time_Entry rows.
+    """
+
+    def scoped(q, column):
+        if project_numbers is not None:
+            q = q.where(column.in_(project_numbers))
+        return q
+
+    stats = {}
+    for (pn,) in conn.execute(scoped(select(Project.Project_Number), Project.Project_Number)):
+        stats[pn] = {"Team_Count": 0, "Total_Hours": Decimal("0"), "Total_Milestones": 0, "Completed_Milestones": 0}
+
+    team = scoped(
+        select(Works_On.Project_Number, func.count()).group_by(Works_On.Project_Number),
+        Works_On.Project_Number,
+    )
+    for pn, count in conn.execute(team):
+        if pn in stats:
+            stats[pn]["Team_Count"] = count
+
+    hours = hours_rollup.project_hours_query(project_numbers)
+    for pn, total in conn.execute(hours):
+        if pn in stats:
+            stats[pn]["Total_Hours"] = Decimal(str(total or 0))
+
+    milestones = scoped(
+        select(
+            ProjectMilestone.Project_Number,
+            func.count(),
+            func.sum(case((ProjectMilestone.Status == "Completed", 1), else_=0)),
+        ).group_by(ProjectMilestone.Project_Number),
+        ProjectMilestone.Project_Number,
+    )
+    for pn, total, completed in conn.execute(milestones):
+        if pn in stats:
+            stats[pn]["Total_Milestones"] = total
+            stats[pn]["Completed_Milestones"] = completed or 0
+
+    return stats
+
+
+def compute_portfolio(conn):
+    """Every project with its stats, merged in Python from the grouped queries."""
+    stats = compute_stats(conn)
+    projects = conn.execute(
+        select(Project.Project_Number, Project.Department_Name, Project.Budget, Employee.Employee_Name)
+        .join(Employee, Project.Manager_Emp_No == Employee.Employee_No)
+    )
+
+    rows = []
+    for pn, dept_name, budget, manager in projects:
+        s = stats[pn]
+        total = s["Total_Milestones"]
+        rows.append({
+            "Project_Number": pn,
+            "Department_Name": dept_name,
+            "Manager": manager,
+            "Budget": budget,
+            "Team_Count": s["Team_Count"],
+            "Total_Hours": s["Total_Hours"],
+            "Total_Milestones": total,
+            "Completed_Milestones": s["Completed_Milestones"],
+            "Completion": round(100 * s["Completed_Milestones"] / total) if total else None,
+        })
+    return rows
+
+
+def refresh_projects(conn, project_numbers):
+    project_numbers = list(set(project_numbers))
+    if not project_numbers:
+        return
+    stats = compute_stats(conn, project_numbers)
+    conn.execute(delete(ProjectStats).where(ProjectStats.Project_Number.in_(project_numbers)))
+    if stats:
+        conn.execute(insert(ProjectStats), [{"Project_Number": pn, **values} for pn, values in stats.items()])
+
+
+def rebuild(conn):
+    stats = compute_stats(conn)
+    conn.execute(delete(ProjectStats))
+    if stats:
+        conn.execute(insert(ProjectStats), [{"Project_Number": pn, **values} for pn, values in stats.items()])
+    return len(stats)
+
+
+def check(conn):
+    """Return {project_number: (stored, expected)} for every row that has drifted."""
+    expected = compute_stats(conn)
+    stored = {
+        row.Project_Number: {c: getattr(row, c) for c in COUNTERS}
+        for row in conn.execute(select(ProjectStats))
+    }
+    drift = {}
+    for pn in expected.keys() | stored.keys():
+        want = expected.get(pn)
+        have = stored.get(pn)
+        if have is None or want is None or any(Decimal(str(have[c])) != Decimal(str(want[c])) for c in COUNTERS):
+            drift[pn] = (have, want)
+    return drift
+
+
+def apply_deltas(conn, deltas):
+    """deltas: {project_number: {counter: amount}}; missing rows are rebuilt from scratch."""
+    missing = []
+    for pn, changes in deltas.items():
+        changes = {c: v for c, v in changes.items() if v}
+        if not changes:
+            continue
+        values = {c: getattr(ProjectStats, c) + v for c, v in changes.items()}
+        result = conn.execute(update(ProjectStats).where(ProjectStats.Project_Number == pn).values(values))
+        if result.rowcount == 0:
+            missing.append(pn)
+    refresh_projects(conn, missing)
+
+
+def _old_value(target, attr):
+    history = inspect(target).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attr)
+
+
+def _hours(value):
+    return Decimal(str(value or 0))
+
+
+def _completed(status):
+    return 1 if status == "Completed" else 0
+
+
+# ---- Project ----
+
+@event.listens_for(Project, "after_insert")
+def _project_inserted(mapper, connection, target):
+    connection.execute(insert(ProjectStats).values(Project_Number=target.Project_Number))
+
+
+@event.listens_for(Project, "before_delete")
+def _project_deleted(mapper, connection, target):
+    connection.execute(delete(ProjectStats).where(ProjectStats.Project_Number == target.Project_Number))
+
+
+# ---- Works_On ----
+
+@event.listens_for(Works_On, "after_insert")
+def _works_on_inserted(mapper, connection, target):
+    apply_deltas(connection, {target.Project_Number: {"Team_Count": 1}})
+
+
+@event.listens_for(Works_On, "after_delete")
+def _works_on_deleted(mapper, connection, target):
+    apply_deltas(connection, {target.Project_Number: {"Team_Count": -1}})
+
+
+# ---- Time_Entry ----
+
+@event.listens_for(TimeEntry, "after_insert")
+def _time_entry_inserted(mapper, connection, target):
+    apply_deltas(connection, {target.Project_Number: {"Total_Hours": _hours(target.Hours)}})
+
+
+@event.listens_for(TimeEntry, "after_update")
+def _time_entry_updated(mapper, connection, target):
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    deltas[_old_value(target, "Project_Number")]["Total_Hours"] -= _hours(_old_value(target, "Hours"))
+    deltas[target.Project_Number]["Total_Hours"] += _hours(target.Hours)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(TimeEntry, "after_delete")
+def _time_entry_deleted(mapper, connection, target):
+    apply_deltas(connection, {target.Project_Number: {"Total_Hours": -_hours(target.Hours)}})
+
+
+# ---- Project_Milestone ----
+
+@event.listens_for(ProjectMilestone, "after_insert")
+def _milestone_inserted(mapper, connection, target):
+    apply_deltas(connection, {
+        target.Project_Number: {"Total_Milestones": 1, "Completed_Milestones": _completed(target.Status)},
+    })
+
+
+@event.listens_for(ProjectMilestone, "after_update")
+def _milestone_updated(mapper, connection, target):
+    deltas = defaultdict(lambda: defaultdict(int))
+    old_pn = _old_value(target, "Project_Number")
+    deltas[old_pn]["Total_Milestones"] -= 1
+    deltas[old_pn]["Completed_Milestones"] -= _completed(_old_value(target, "Status"))
+    deltas[target.Project_Number]["Total_Milestones"] += 1
+    deltas[target.Project_Number]["Completed_Milestones"] += _completed(target.Status)
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(ProjectMilestone, "after_delete")
+def _milestone_deleted(mapper, connection, target):
+    apply_deltas(connection, {
+        target.Project_Number: {"Total_Milestones": -1, "Completed_Milestones": -_completed(target.Status)},
+    })
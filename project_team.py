@@ -0,0 +1,60 @@
+# project_team.py
+# Sets a project's whole Works_On membership at once: one query reads the
+# current team, the difference goes in as one bulk INSERT and one DELETE per
+# chunk, all in the caller's transaction. Members who stay keep their
+# Time_Spent and Role. Bulk statements skip the ORM events, so Team_Count in
+# Project_Stats is adjusted here.
+from sqlalchemy import delete, insert, select
+
+from models import Employee, Works_On
+import project_summary
+
+CHUNK = 1000  # employee numbers per IN list
+
+
+def _chunks(items, size=CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def current_team(session, project_number):
+    return set(session.execute(
+        select(Works_On.Employee_No).where(Works_On.Project_Number == project_number)
+    ).scalars())
+
+
+def unknown_employees(session, employee_nos):
+    """The numbers in employee_nos with no Employee row, sorted."""
+    wanted = sorted(set(employee_nos))
+    found = set()
+    for chunk in _chunks(wanted):
+        found.update(session.execute(
+            select(Employee.Employee_No).where(Employee.Employee_No.in_(chunk))
+        ).scalars())
+    return [n for n in wanted if n not in found]
+
+
+def set_team(session, project_number, employee_nos):
+    """
+    Make employee_nos the project's full team. Returns (added, removed) as
+    sorted lists of employee numbers. The caller checks unknown_employees()
+    first and commits.
+    """
+    wanted = set(employee_nos)
+    current = current_team(session, project_number)
+    added = sorted(wanted - current)
+    removed = sorted(current - wanted)
+
+    if added:
+        session.execute(
+            insert(Works_On),
+            [{"Employee_No": n, "Project_Number": project_number} for n in added],
+        )
+    for chunk in _chunks(removed):
+        session.execute(
+            delete(Works_On).where(Works_On.Project_Number == project_number, Works_On.Employee_No.in_(chunk)),
+            execution_options={"synchronize_session": False},
+        )
+
+    project_summary.apply_deltas(session.connection(), {project_number: {"Team_Count": len(added) - len(removed)}})
+    return added, removed
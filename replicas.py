@@ -0,0 +1,176 @@
+# replicas.py
+# Optional read replicas. DATABASE_REPLICA_URLS (comma-separated) become the
+# SQLALCHEMY_BINDS replica_0, replica_1, ...; views marked @read_replica run
+# their SELECTs on one replica per request, picked round-robin among those that
+# passed a recent health check, and fall back to the primary when none did.
+#
+# Everything else stays on the primary: flushes and write statements, reads
+# through session.connection() (bulk helpers that may also write), the rest of
+# any request that wrote, and every request a client makes within
+# REPLICA_PIN_SECONDS of one of its own writes, so users see their changes.
+#
+# Local setup with two SQLite files:
+#   DATABASE_URL=sqlite:///primary.db DATABASE_REPLICA_URLS=sqlite:///replica.db
+#   flask --app app replicas sync      # copy the primary into every SQLite replica
+#   flask --app app replicas status
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+import click
+from flask import current_app, g, has_app_context, request, session as client_session
+from flask.cli import AppGroup
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, func, select
+from sqlalchemy.sql.dml import UpdateBase
+
+from models import db, TableVersion
+
+PREFIX = "replica_"
+HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+RETRY_AFTER = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "5"))
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_health = {}  # bind key -> (healthy, monotonic time of the check)
+_turn = itertools.count()
+_lock = threading.Lock()
+
+
+def bind_config(urls):
+    """SQLALCHEMY_BINDS entries for a comma-separated list of replica URLs."""
+    urls = [u.strip() for u in (urls or "").split(",") if u.strip()]
+    return {f"{PREFIX}{i}": url for i, url in enumerate(urls)}
+
+
+def replica_keys():
+    return sorted(k for k in db.engines if k is not None and k.startswith(PREFIX))
+
+
+def check(key, force=False):
+    # Unhealthy replicas are retried less often than healthy ones are re-checked
+    now = time.monotonic()
+    state = _health.get(key)
+    if state is not None and not force:
+        healthy, checked_at = state
+        if now - checked_at < (HEALTH_INTERVAL if healthy else RETRY_AFTER):
+            return healthy
+
+    try:
+        with db.engines[key].connect() as conn:
+            # A table the app needs, not just SELECT 1: an empty or unmigrated
+            # replica is as useless as an unreachable one
+            conn.execute(select(TableVersion.Table_Name).limit(1))
+        healthy = True
+    except Exception as exc:
+        current_app.logger.warning("Read replica %s failed its health check: %s", key, exc)
+        healthy = False
+    with _lock:
+        _health[key] = (healthy, now)
+    return healthy
+
+
+def pick():
+    """Next healthy replica's bind key, round-robin, or None for the primary."""
+    keys = replica_keys()
+    if not keys:
+        return None
+    start = next(_turn)
+    for i in range(len(keys)):
+        key = keys[(start + i) % len(keys)]
+        if check(key):
+            return key
+    return None
+
+
+def _pinned():
+    return client_session.get("primary_until", 0) > time.time()
+
+
+def read_replica(view):
+    """Decorator: let a read-only view's queries go to a replica."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if request.method in SAFE_METHODS and not _pinned():
+            g.replica = pick()
+        return view(*args, **kwargs)
+
+    return wrapped
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        key = g.get("replica") if has_app_context() else None
+        if key is not None and bind is None:
+            if not self._flushing and isinstance(clause, Select):
+                return self._db.engines[key]
+            # Anything else ends this request's use of the replica
+            g.replica = None
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.replica_wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _pin_after_write(response):
+    if request.method not in SAFE_METHODS or g.pop("replica_wrote", False):
+        client_session["primary_until"] = time.time() + PIN_SECONDS
+    return response
+
+
+def init_app(app):
+    db.session.session_factory.class_ = RoutingSession
+    if any(key.startswith(PREFIX) for key in app.config.get("SQLALCHEMY_BINDS") or {}):
+        app.after_request(_pin_after_write)
+
+
+replicas_cli = AppGroup("replicas", help="Read replicas (DATABASE_REPLICA_URLS).")
+
+
+def _last_write(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(TableVersion.Updated_At))).scalar()
+
+
+@replicas_cli.command("status")
+def status_command():
+    """Health and lag (by latest Table_Version write) of every replica."""
+    keys = replica_keys()
+    if not keys:
+        click.echo("No replicas configured; set DATABASE_REPLICA_URLS.")
+        return
+    primary = _last_write(db.engine)
+    for key in keys:
+        engine = db.engines[key]
+        line = f"{key} {engine.url.render_as_string(hide_password=True)}: "
+        if not check(key, force=True):
+            click.echo(line + "unhealthy")
+            continue
+        replica = _last_write(engine)
+        lag = (primary - replica).total_seconds() if primary and replica else 0
+        click.echo(line + f"healthy, {max(lag, 0):.1f}s behind")
+
+
+@replicas_cli.command("sync")
+def sync_command():
+    """Copy a SQLite primary into every SQLite replica (local testing only)."""
+    if db.engine.dialect.name != "sqlite":
+        raise click.UsageError("sync only copies SQLite files; use real replication elsewhere.")
+    for key in replica_keys():
+        engine = db.engines[key]
+        if engine.dialect.name != "sqlite":
+            click.echo(f"{key}: skipped (not SQLite)")
+            continue
+        source = db.engine.raw_connection()
+        try:
+            target = sqlite3.connect(engine.url.database)
+            try:
+                source.driver_connection.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+        engine.dispose()
+        click.echo(f"{key}: copied from {db.engine.url.database}")
@@ -1,11 +1,15 @@
 # routes/buildings.py
 from flask import Blueprint, render_template, request, redirect, url_for
 from models import db, Building
+from conditional import etag
+from replicas import read_replica
 
 bp = Blueprint("buildings", __name__, url_prefix="/buildings")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Building"])
 def list_buildings():
     buildings = Building.query.order_by(Building.Building_Code).all()
     return render_template("buildings/list.html", buildings=buildings)
@@ -1,11 +1,16 @@
 # routes/departments.py
 from flask import Blueprint, render_template, request, redirect, url_for
 from models import db, Department, Division
+from conditional import etag
+from replicas import read_replica
+import cache
 
 bp = Blueprint("departments", __name__, url_prefix="/departments")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Department", "Division"])
 def list_departments():
     departments = (
         db.session.query(Department, Division)
@@ -18,7 +23,7 @@ def list_departments():
 
 @bp.route("/create", methods=["GET", "POST"])
 def create_department():
-    divisions = Division.query.order_by(Division.Division_Name).all()
+    divisions = cache.reference(Division, Division.Division_Name)
 
     if request.method == "POST":
         name = request.form.get("Department_Name", "").strip()
@@ -55,7 +60,7 @@ def create_department():
 @bp.route("/<department_name>/edit", methods=["GET", "POST"])
 def edit_department(department_name):
     dept = Department.query.get_or_404(department_name)
-    divisions = Division.query.order_by(Division.Division_Name).all()
+    divisions = cache.reference(Division, Division.Division_Name)
 
     if request.method == "POST":
         budget = request.form.get("Budget", "").strip()
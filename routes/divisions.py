@@ -1,11 +1,15 @@
 # routes/divisions.py
 from flask import Blueprint, render_template, request, redirect, url_for
 from models import db, Division
+from conditional import etag
+from replicas import read_replica
 
 bp = Blueprint("divisions", __name__, url_prefix="/divisions")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Division"])
 def list_divisions():
     divisions = Division.query.order_by(Division.Division_Name).all()
     return render_template("divisions/list.html", divisions=divisions)
@@ -1,12 +1,20 @@
 # routes/employees.py
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import db, Employee, Works_On, Project, Division, Department, TimeEntry, PayrollHistory, ProjectEmployee, Employee_Title
+import re
+from models import db, Employee, Division, Department, Employee_Title
+from conditional import etag
+from replicas import read_replica
+from streaming import render_rows
+import cache
 from datetime import datetime
+from offboarding import offboard
 
 bp = Blueprint("employees", __name__, url_prefix="/employees")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Employee", "Department", "Division", "Employee_Title"])
 def list_employees():
     employees = (
         db.session.query(Employee, Department, Division, Employee_Title)
@@ -14,16 +22,15 @@ def list_employees():
         .outerjoin(Division, Employee.Division_Name == Division.Division_Name)
         .outerjoin(Employee_Title, Employee.Title == Employee_Title.Title)
         .order_by(Employee.Employee_Name)
-        .all()
     )
-    return render_template("employees/list.html", employees=employees)
+    return render_rows("employees/list.html", employees, name="employees")
 
 
 @bp.route("/create", methods=["GET", "POST"])
 def create_employee():
-    departments = Department.query.order_by(Department.Department_Name).all()
-    divisions = Division.query.order_by(Division.Division_Name).all()
-    titles = Employee_Title.query.order_by(Employee_Title.Title).all()
+    departments = cache.reference(Department, Department.Department_Name)
+    divisions = cache.reference(Division, Division.Division_Name)
+    titles = cache.reference(Employee_Title, Employee_Title.Title)
 
     if request.method == "POST":
         emp_no_str = request.form.get("Employee_No", "").strip()
@@ -100,9 +107,9 @@ def create_employee():
 @bp.route("/<int:employee_no>/edit", methods=["GET", "POST"])
 def edit_employee(employee_no):
     emp = Employee.query.get_or_404(employee_no)
-    departments = Department.query.order_by(Department.Department_Name).all()
-    divisions = Division.query.order_by(Division.Division_Name).all()
-    titles = Employee_Title.query.order_by(Employee_Title.Title).all()
+    departments = cache.reference(Department, Department.Department_Name)
+    divisions = cache.reference(Division, Division.Division_Name)
+    titles = cache.reference(Employee_Title, Employee_Title.Title)
 
     if request.method == "POST":
         name = request.form.get("Employee_Name", "").strip()
@@ -157,51 +164,56 @@ def edit_employee(employee_no):
 
 @bp.route("/<int:employee_no>/delete", methods=["POST"])
 def delete_employee(employee_no):
-    emp = Employee.query.get_or_404(employee_no)
+    Employee.query.get_or_404(employee_no)
 
     # ---- BLOCK if employee is referenced in "leadership" roles ----
-    manages_projects = Project.query.filter_by(Manager_Emp_No=employee_no).count() > 0
-    is_div_head = Division.query.filter_by(Head_Emp_No=employee_no).count() > 0
-    is_dept_head = Department.query.filter_by(Head_Emp_No=employee_no).count() > 0
-
-    if manages_projects or is_div_head or is_dept_head:
-        msg_parts = []
-        if manages_projects:
-            msg_parts.append("manages one or more projects")
-        if is_div_head:
-            msg_parts.append("is a division head")
-        if is_dept_head:
-            msg_parts.append("is a department head")
-
-        # You can flash or render an error page; this is simple:
-        flash(f"Cannot delete employee #{employee_no}: employee " + ", ".join(msg_parts) +
+    [result] = offboard(db.session, [employee_no])
+    if result["status"] == "blocked":
+        flash(f"Cannot delete employee #{employee_no}: employee " + ", ".join(result["reasons"]) +
               ". Reassign these roles first.", "danger")
         return redirect(url_for("employees.list_employees"))
 
-    # ---- DELETE "child" records that reference Employee_No ----
-    Works_On.query.filter_by(Employee_No=employee_no).delete()
-
-    # If you have hourly project employees table:
-    try:
-        ProjectEmployee.query.filter_by(Employee_No=employee_no).delete()
-    except Exception:
-        pass  # ignore if your project doesn't have this model
-
-    # If you have time entries:
-    try:
-        TimeEntry.query.filter_by(Employee_No=employee_no).delete()
-    except Exception:
-        pass
-
-    # If you have payroll history:
-    try:
-        PayrollHistory.query.filter_by(Employee_No=employee_no).delete()
-    except Exception:
-        pass
-
-    # ---- Now delete the employee itself ----
-    db.session.delete(emp)
     db.session.commit()
-
     flash(f"Employee #{employee_no} deleted.", "success")
     return redirect(url_for("employees.list_employees"))
+
+
+@bp.route("/offboard", methods=["GET", "POST"])
+def offboard_employees():
+    departments = cache.reference(Department, Department.Department_Name)
+
+    if request.method == "POST":
+        numbers_str = request.form.get("Employee_Nos", "").strip()
+        dept_name = request.form.get("Department_Name") or None
+        dry_run = request.form.get("dry_run") == "1"
+
+        try:
+            employee_nos = [int(n) for n in re.split(r"[\s,]+", numbers_str) if n] or None
+        except ValueError:
+            return render_template(
+                "employees/offboard.html",
+                departments=departments,
+                error="Employee numbers must be integers separated by commas or spaces.",
+            )
+
+        if employee_nos is None and not dept_name:
+            return render_template(
+                "employees/offboard.html",
+                departments=departments,
+                error="Enter employee numbers or choose a department.",
+            )
+
+        report = offboard(db.session, employee_nos, dept_name, dry_run=dry_run)
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        return render_template(
+            "employees/offboard.html",
+            departments=departments,
+            report=report,
+            dry_run=dry_run,
+            form=request.form,
+        )
+
+    return render_template("employees/offboard.html", departments=departments)
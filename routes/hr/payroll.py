@@ -1,14 +1,40 @@
-from flask import Blueprint, render_template, request, redirect, url_for
-from sqlalchemy import func
+import csv
+import io
+import json
+import time
+import click
+from flask import Blueprint, Response, abort, current_app, jsonify, render_template, request, redirect, url_for, stream_with_context
 from datetime import date
 from decimal import Decimal
-from models import db, PayrollHistory, Employee, Employee_Title, ProjectEmployee, TimeEntry
+from sqlalchemy import func, select, tuple_
+from models import db, PayrollHistory, PayrollJob, Employee
+from conditional import etag
+from replicas import read_replica
+import cache
+import payroll_jobs
+from payroll_backfill import parse_period, run_backfill
+from payroll_engine import check_period
 
 bp = Blueprint("payroll", __name__, url_prefix="/payroll")
 
-FED = Decimal("0.10")
-STATE = Decimal("0.05")
-OTHER = Decimal("0.03")
+EXPORT_COLUMNS = [
+    PayrollHistory.Employee_No,
+    Employee.Employee_Name,
+    PayrollHistory.Pay_Year,
+    PayrollHistory.Pay_Month,
+    PayrollHistory.Rate_Type,
+    PayrollHistory.Base_Rate_Used,
+    PayrollHistory.Gross_Pay,
+    PayrollHistory.Federal_Tax,
+    PayrollHistory.State_Tax,
+    PayrollHistory.Other_Tax,
+    PayrollHistory.Net_Pay,
+]
+EXPORT_BATCH = 1000
+PERIODS_PER_PAGE = 6
+DETAIL_PAGE_SIZE = 100
+SUMMARY_AMOUNTS = ("Gross_Pay", "Federal_Tax", "State_Tax", "Other_Tax", "Net_Pay")
+RECENT_JOBS = 10
 
 
 @bp.route("/")
@@ -25,120 +51,252 @@ def run_payroll():
         if not year_str or not month_str:
             return render_template("payroll/run.html", error="Year and month are required.")
 
-        year = int(year_str)
-        month = int(month_str)
-
-        # Determine month date range
-        start = date(year, month, 1)
-        if month == 12:
-            end = date(year + 1, 1, 1)
-        else:
-            end = date(year, month + 1, 1)
-
-        # --- Salaried employees: use Employee_Title.Salary ---
-        salaried_rows = (
-            db.session.query(Employee, Employee_Title)
-            .join(Employee_Title, Employee.Title == Employee_Title.Title)
-            .all()
-        )
-
-        created = 0
-
-        for emp, title in salaried_rows:
-            # Skip if employee is also an hourly project-employee
-            # (You can remove this if you want to allow both)
-            if ProjectEmployee.query.get(emp.Employee_No):
-                continue
-
-            exists = (
-                PayrollHistory.query.filter_by(Employee_No=emp.Employee_No, Pay_Year=year, Pay_Month=month)
-                .first()
-            )
-            if exists:
-                continue
-
-            gross = Decimal(str(title.Salary))
-            federal = (gross * FED).quantize(Decimal("0.01"))
-            state = (gross * STATE).quantize(Decimal("0.01"))
-            other = (gross * OTHER).quantize(Decimal("0.01"))
-            net = (gross - federal - state - other).quantize(Decimal("0.01"))
-
-            ph = PayrollHistory(
-                Employee_No=emp.Employee_No,
-                Pay_Year=year,
-                Pay_Month=month,
-                Gross_Pay=gross,
-                Federal_Tax=federal,
-                State_Tax=state,
-                Other_Tax=other,
-                Net_Pay=net,
-                Rate_Type="SALARY",
-                Base_Rate_Used=title.Salary,
-            )
-            db.session.add(ph)
-            created += 1
-
-        # --- Hourly employees: hours for month * hourly_rate ---
-        hourly_rows = ProjectEmployee.query.all()
-
-        for pe in hourly_rows:
-            exists = (
-                PayrollHistory.query.filter_by(Employee_No=pe.Employee_No, Pay_Year=year, Pay_Month=month)
-                .first()
-            )
-            if exists:
-                continue
-
-            total_hours = (
-                db.session.query(func.coalesce(func.sum(TimeEntry.Hours), 0))
-                .filter(TimeEntry.Employee_No == pe.Employee_No)
-                .filter(TimeEntry.Work_Date >= start)
-                .filter(TimeEntry.Work_Date < end)
-                .scalar()
-            )
-
-            rate = Decimal(str(pe.Hourly_Rate))
-            gross = (Decimal(str(total_hours)) * rate).quantize(Decimal("0.01"))
-
-            federal = (gross * FED).quantize(Decimal("0.01"))
-            state = (gross * STATE).quantize(Decimal("0.01"))
-            other = (gross * OTHER).quantize(Decimal("0.01"))
-            net = (gross - federal - state - other).quantize(Decimal("0.01"))
-
-            ph = PayrollHistory(
-                Employee_No=pe.Employee_No,
-                Pay_Year=year,
-                Pay_Month=month,
-                Gross_Pay=gross,
-                Federal_Tax=federal,
-                State_Tax=state,
-                Other_Tax=other,
-                Net_Pay=net,
-                Rate_Type="HOURLY",
-                Base_Rate_Used=pe.Hourly_Rate,
-            )
-            db.session.add(ph)
-            created += 1
+        try:
+            year = int(year_str)
+            month = int(month_str)
+            check_period(year, month)
+        except ValueError:
+            return render_template("payroll/run.html", error="Enter a valid year and a month from 1 to 12.")
 
+        # The run itself happens on a background worker; the page polls its progress
+        job = payroll_jobs.enqueue(db.session, year, month)
         db.session.commit()
-        return redirect(url_for("payroll.history", year=year, month=month))
+        if job.Status == "queued":
+            payroll_jobs.submit(current_app._get_current_object(), job.Job_ID)
+        return redirect(url_for("payroll.job", job_id=job.Job_ID))
+
+    jobs = PayrollJob.query.order_by(PayrollJob.Job_ID.desc()).limit(RECENT_JOBS).all()
+    return render_template("payroll/run.html", jobs=jobs)
+
+
+@bp.route("/jobs/<int:job_id>")
+def job(job_id):
+    job = PayrollJob.query.get_or_404(job_id)
+    return render_template("payroll/job.html", job=job, progress=payroll_jobs.progress(job))
+
 
-    return render_template("payroll/run.html")
+@bp.route("/jobs/<int:job_id>/status")
+def job_status(job_id):
+    job = PayrollJob.query.get_or_404(job_id)
+    if payroll_jobs.is_abandoned(job):
+        # Its worker is gone; whichever process claims it first carries on
+        payroll_jobs.submit(current_app._get_current_object(), job.Job_ID)
+    return jsonify(payroll_jobs.progress(job))
 
 
 @bp.route("/history")
+@read_replica
+@etag(["Payroll_History", "Employee"])
 def history():
     year = request.args.get("year", type=int)
     month = request.args.get("month", type=int)
 
+    if year and month:
+        return _period_detail(year, month)
+
+    # Newest periods first, PERIODS_PER_PAGE at a time; `before` is the last period shown
+    before = request.args.get("before")
+    cutoff = None
+    if before:
+        try:
+            cutoff = parse_period(before)
+        except ValueError:
+            abort(400)
+    periods = _periods(cutoff, PERIODS_PER_PAGE + 1)
+    page = periods[:PERIODS_PER_PAGE]
+    next_before = f"{page[-1][0]}-{page[-1][1]:02d}" if len(periods) > PERIODS_PER_PAGE else None
+
+    summaries = _period_summaries(page)
+    return render_template(
+        "payroll/history.html",
+        periods=[(p, summaries.get(p)) for p in page],
+        next_before=next_before,
+        paged=bool(before),
+        year=year,
+        month=month,
+    )
+
+
+def _period_detail(year, month):
+    # One period, keyset-paged by Employee_No along ix_payroll_period
+    after = request.args.get("after", type=int)
     q = (
         db.session.query(PayrollHistory, Employee)
         .join(Employee, PayrollHistory.Employee_No == Employee.Employee_No)
-        .order_by(PayrollHistory.Pay_Year.desc(), PayrollHistory.Pay_Month.desc(), Employee.Employee_Name)
+        .order_by(PayrollHistory.Employee_No)
+    )
+    q = _filter_period(q, year, month)
+    if after is not None:
+        q = q.filter(PayrollHistory.Employee_No > after)
+
+    rows = q.limit(DETAIL_PAGE_SIZE + 1).all()
+    next_after = rows[DETAIL_PAGE_SIZE - 1][0].Employee_No if len(rows) > DETAIL_PAGE_SIZE else None
+    summary = _period_summaries([(year, month)]).get((year, month))
+    return render_template(
+        "payroll/history.html",
+        rows=rows[:DETAIL_PAGE_SIZE],
+        summary=summary,
+        next_after=next_after,
+        paged=after is not None,
+        year=year,
+        month=month,
+    )
+
+
+def _periods(before, limit):
+    # Distinct (year, month) pairs older than `before`, newest first: a
+    # backward index-only scan of ix_payroll_period that stops after `limit`
+    stmt = (
+        select(PayrollHistory.Pay_Year, PayrollHistory.Pay_Month)
+        .distinct()
+        .order_by(PayrollHistory.Pay_Year.desc(), PayrollHistory.Pay_Month.desc())
+        .limit(limit)
+    )
+    if before:
+        stmt = stmt.where(tuple_(PayrollHistory.Pay_Year, PayrollHistory.Pay_Month) < before)
+    return [tuple(p) for p in db.session.execute(stmt)]
+
+
+def _compute_summaries(periods):
+    # Totals per period and headcount per Rate_Type, all from one grouped query
+    summaries = {}
+    if not periods:
+        return summaries
+    rows = db.session.execute(
+        select(
+            PayrollHistory.Pay_Year,
+            PayrollHistory.Pay_Month,
+            PayrollHistory.Rate_Type,
+            func.count(),
+            func.sum(PayrollHistory.Gross_Pay),
+            func.sum(PayrollHistory.Federal_Tax),
+            func.sum(PayrollHistory.State_Tax),
+            func.sum(PayrollHistory.Other_Tax),
+            func.sum(PayrollHistory.Net_Pay),
+        )
+        .where(tuple_(PayrollHistory.Pay_Year, PayrollHistory.Pay_Month).in_(periods))
+        .group_by(PayrollHistory.Pay_Year, PayrollHistory.Pay_Month, PayrollHistory.Rate_Type)
+    )
+    for year, month, rate_type, headcount, *amounts in rows:
+        summary = summaries.setdefault((year, month), {
+            "headcount": 0,
+            "by_type": {},
+            **{name: Decimal("0") for name in SUMMARY_AMOUNTS},
+        })
+        summary["headcount"] += headcount
+        summary["by_type"][rate_type] = headcount
+        for name, amount in zip(SUMMARY_AMOUNTS, amounts):
+            summary[name] += Decimal(str(amount or 0))
+    return summaries
+
+
+def _period_summaries(periods):
+    # Periods before the current month are closed; their summaries come from the cache
+    today = date.today()
+    closed = [p for p in periods if p < (today.year, today.month)]
+    open_ = [p for p in periods if p not in closed]
+
+    # Keyed on each period's own token: a payroll run for this month leaves closed ones cached
+    cached = cache.cached_many(
+        [("payroll_summary",) + p for p in closed],
+        lambda key: cache.period_tables([PayrollHistory.__tablename__], *key[1:]),
+        lambda keys: {("payroll_summary",) + p: s for p, s in _compute_summaries([k[1:] for k in keys]).items()},
+    )
+    summaries = {key[1:]: s for key, s in cached.items()}
+    summaries.update(_compute_summaries(open_))
+    return summaries
+
+
+@bp.route("/history/export.<fmt>")
+@read_replica
+def export_history(fmt):
+    if fmt not in ("csv", "ndjson"):
+        abort(404)
+
+    year = request.args.get("year", type=int)
+    month = request.args.get("month", type=int)
+
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .join(Employee, PayrollHistory.Employee_No == Employee.Employee_No)
+        .order_by(PayrollHistory.Pay_Year, PayrollHistory.Pay_Month, PayrollHistory.Employee_No)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    stmt = _filter_period(stmt, year, month)
+    names = [c.key for c in EXPORT_COLUMNS]
+
+    def generate():
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(names)
+            # Header goes out before the query runs so the client sees bytes at once
+            yield _drain(buf)
+
+        # yield_per streams through a server-side cursor: only one batch is ever in memory
+        for batch in db.session.execute(stmt).partitions():
+            if fmt == "csv":
+                writer.writerows(batch)
+                yield _drain(buf)
+            else:
+                yield "".join(json.dumps(dict(zip(names, row)), default=str) + "\n" for row in batch)
+
+    filename = "payroll_history"
+    if year and month:
+        filename += f"_{year}_{month:02d}"
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"},
     )
 
+
+def _filter_period(q, year, month):
     if year and month:
         q = q.filter(PayrollHistory.Pay_Year == year, PayrollHistory.Pay_Month == month)
+    return q
+
+
+def _drain(buf):
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
+
+
+@bp.cli.command("backfill")
+@click.argument("first")
+@click.argument("last")
+@click.option("--shards", default=4, show_default=True, help="Employee_No shards per period.")
+@click.option("--workers", default=4, show_default=True, help="Worker processes.")
+def backfill(first, last, shards, workers):
+    """Run payroll for every period from FIRST to LAST (YYYY-MM, inclusive)."""
+    url = db.engine.url.render_as_string(hide_password=False)
+    started = time.perf_counter()
+    total = 0
+
+    for r in run_backfill(url, parse_period(first), parse_period(last), shards=shards, workers=workers):
+        rate = r.rows / r.seconds if r.seconds else 0
+        click.echo(
+            f"{r.year}-{r.month:02d} shard {r.shard + 1}/{r.shards}: "
+            f"{r.rows} rows in {r.seconds:.2f}s ({rate:.0f} rows/s)"
+        )
+        total += r.rows
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Done: {total} rows in {elapsed:.2f}s ({total / elapsed:.0f} rows/s)")
+
 
-    rows = q.all()
-    return render_template("payroll/history.html", rows=rows, year=year, month=month)
+@bp.cli.command("resume-jobs")
+def resume_jobs():
+    """Run queued payroll jobs and take over running ones whose worker died."""
+    app = current_app._get_current_object()
+    job_ids = payroll_jobs.resumable(db.session)
+    for job_id in job_ids:
+        payroll_jobs.run_job(app, job_id)
+        job = db.session.get(PayrollJob, job_id)
+        click.echo(f"Job {job_id} ({job.Pay_Year}-{job.Pay_Month:02d}): {job.Status}, {job.Processed} employees paid")
+    if not job_ids:
+        click.echo("No payroll jobs to resume.")
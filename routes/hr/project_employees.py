@@ -1,27 +1,29 @@
 from flask import Blueprint, render_template, request, redirect, url_for
 from datetime import datetime
 from models import db, ProjectEmployee, Employee, Project
+from conditional import etag
+from replicas import read_replica
+from streaming import render_rows
+from routes.search import project_label
 
 bp = Blueprint("project_employees", __name__, url_prefix="/project-employees")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Project_Employee", "Employee", "Project"])
 def list_project_employees():
     rows = (
         db.session.query(ProjectEmployee, Employee, Project)
         .join(Employee, ProjectEmployee.Employee_No == Employee.Employee_No)
         .join(Project, ProjectEmployee.Project_Number == Project.Project_Number)
         .order_by(Employee.Employee_Name)
-        .all()
     )
-    return render_template("project_employees/list.html", rows=rows)
+    return render_rows("project_employees/list.html", rows)
 
 
 @bp.route("/create", methods=["GET", "POST"])
 def create_project_employee():
-    employees = Employee.query.order_by(Employee.Employee_Name).all()
-    projects = Project.query.order_by(Project.Project_Number).all()
-
     if request.method == "POST":
         emp_no = request.form.get("Employee_No")
         proj_no = request.form.get("Project_Number")
@@ -32,16 +34,12 @@ def create_project_employee():
         if not emp_no or not proj_no or not hourly_rate or not start_str:
             return render_template(
                 "project_employees/create.html",
-                employees=employees,
-                projects=projects,
                 error="Employee, project, hourly rate, and start date are required.",
             )
 
         if ProjectEmployee.query.get(int(emp_no)):
             return render_template(
                 "project_employees/create.html",
-                employees=employees,
-                projects=projects,
                 error="This employee already has an hourly project contract.",
             )
 
@@ -50,8 +48,6 @@ def create_project_employee():
         except ValueError:
             return render_template(
                 "project_employees/create.html",
-                employees=employees,
-                projects=projects,
                 error="Start date must be YYYY-MM-DD.",
             )
 
@@ -62,8 +58,6 @@ def create_project_employee():
             except ValueError:
                 return render_template(
                     "project_employees/create.html",
-                    employees=employees,
-                    projects=projects,
                     error="End date must be YYYY-MM-DD.",
                 )
 
@@ -78,14 +72,12 @@ def create_project_employee():
         db.session.commit()
         return redirect(url_for("project_employees.list_project_employees"))
 
-    return render_template("project_employees/create.html", employees=employees, projects=projects)
+    return render_template("project_employees/create.html")
 
 
 @bp.route("/<int:employee_no>/edit", methods=["GET", "POST"])
 def edit_project_employee(employee_no):
     pe = ProjectEmployee.query.get_or_404(employee_no)
-    projects = Project.query.order_by(Project.Project_Number).all()
-
     if request.method == "POST":
         proj_no = request.form.get("Project_Number")
         hourly_rate = request.form.get("Hourly_Rate", "").strip()
@@ -96,7 +88,7 @@ def edit_project_employee(employee_no):
             return render_template(
                 "project_employees/edit.html",
                 pe=pe,
-                projects=projects,
+                project_label=project_label(pe.Project_Number),
                 error="Project, hourly rate, and start date are required.",
             )
 
@@ -106,7 +98,7 @@ def edit_project_employee(employee_no):
             return render_template(
                 "project_employees/edit.html",
                 pe=pe,
-                projects=projects,
+                project_label=project_label(pe.Project_Number),
                 error="Start date must be YYYY-MM-DD.",
             )
 
@@ -118,7 +110,7 @@ def edit_project_employee(employee_no):
                 return render_template(
                     "project_employees/edit.html",
                     pe=pe,
-                    projects=projects,
+                    project_label=project_label(pe.Project_Number),
                     error="End date must be YYYY-MM-DD.",
                 )
 
@@ -130,7 +122,7 @@ def edit_project_employee(employee_no):
         db.session.commit()
         return redirect(url_for("project_employees.list_project_employees"))
 
-    return render_template("project_employees/edit.html", pe=pe, projects=projects)
+    return render_template("project_employees/edit.html", pe=pe, project_label=project_label(pe.Project_Number))
 
 
 @bp.route("/<int:employee_no>/delete", methods=["POST"])
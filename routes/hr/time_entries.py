@@ -1,27 +1,306 @@
-from flask import Blueprint, render_template, request, redirect, url_for
-from datetime import datetime
+import csv
+import io
+import os
+import re
+import tempfile
+import time
+import uuid
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, send_file, abort, jsonify
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import date, datetime
 from models import db, TimeEntry, Employee, Project
+from conditional import etag
+from replicas import read_replica
+import bulk_load
+import hours_rollup
+import project_summary
+from routes.search import employee_label, project_label
 
 bp = Blueprint("time_entries", __name__, url_prefix="/time-entries")
 
+PAGE_SIZE = 50
+
+IMPORT_COLUMNS = ["Employee_No", "Project_Number", "Work_Date", "Hours"]
+IMPORT_ERROR_DIR = os.getenv("IMPORT_ERROR_DIR", os.path.join(tempfile.gettempdir(), "time_entry_imports"))
+IMPORT_ERROR_MAX_AGE = float(os.getenv("IMPORT_ERROR_MAX_AGE", str(24 * 3600)))  # seconds
+MAX_HOURS = Decimal("24")
+CENT = Decimal("0.01")  # Time_Entry.Hours is Numeric(6, 2)
+MAX_BATCH = 1000
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_cursor(value):
+    # Cursor is "<Work_Date>_<Time_Entry_ID>" of the last row on the previous page
+    try:
+        date_str, id_str = value.split("_")
+        return datetime.strptime(date_str, "%Y-%m-%d").date(), int(id_str)
+    except (AttributeError, ValueError):
+        return None
+
 
 @bp.route("/")
+@read_replica
+@etag(["Time_Entry", "Employee"])
 def list_time_entries():
-    rows = (
-        db.session.query(TimeEntry, Employee, Project)
+    filters = {
+        "employee": request.args.get("employee", type=int),
+        "project": request.args.get("project", type=int),
+        "date_from": _parse_date(request.args.get("date_from")),
+        "date_to": _parse_date(request.args.get("date_to")),
+    }
+    cursor = _parse_cursor(request.args.get("after"))
+
+    q = (
+        db.session.query(TimeEntry, Employee)
         .join(Employee, TimeEntry.Employee_No == Employee.Employee_No)
-        .join(Project, TimeEntry.Project_Number == Project.Project_Number)
-        .order_by(TimeEntry.Work_Date.desc())
+    )
+    if filters["employee"]:
+        q = q.filter(TimeEntry.Employee_No == filters["employee"])
+    if filters["project"]:
+        q = q.filter(TimeEntry.Project_Number == filters["project"])
+    if filters["date_from"]:
+        q = q.filter(TimeEntry.Work_Date >= filters["date_from"])
+    if filters["date_to"]:
+        q = q.filter(TimeEntry.Work_Date <= filters["date_to"])
+    if cursor:
+        q = q.filter(tuple_(TimeEntry.Work_Date, TimeEntry.Time_Entry_ID) < cursor)
+
+    rows = (
+        q.order_by(TimeEntry.Work_Date.desc(), TimeEntry.Time_Entry_ID.desc())
+        .limit(PAGE_SIZE + 1)
         .all()
     )
-    return render_template("time_entries/list.html", rows=rows)
+
+    next_cursor = None
+    if len(rows) > PAGE_SIZE:
+        rows = rows[:PAGE_SIZE]
+        last = rows[-1][0]
+        next_cursor = f"{last.Work_Date.isoformat()}_{last.Time_Entry_ID}"
+
+    return render_template(
+        "time_entries/list.html",
+        rows=rows,
+        filters={k: v for k, v in filters.items() if v},
+        cursor=cursor,
+        next_cursor=next_cursor,
+    )
+
+
+def _is_number(value):
+    # ASCII only: str.isdigit() also accepts "²" and the like, which int() rejects
+    return value.isascii() and value.isdigit()
+
+
+def _check_import_row(values, employees, projects):
+    emp_str, proj_str, date_str, hours_str = values
+    if not (_is_number(emp_str) and _is_number(proj_str)):
+        return None, "Employee_No and Project_Number must be integers."
+    emp_no = int(emp_str)
+    proj_no = int(proj_str)
+    if emp_no not in employees:
+        return None, f"Unknown employee #{emp_no}."
+    if proj_no not in projects:
+        return None, f"Unknown project #{proj_no}."
+    try:
+        work_date = date.fromisoformat(date_str)
+    except ValueError:
+        return None, "Work_Date must be YYYY-MM-DD."
+    try:
+        hours = Decimal(hours_str)
+    except InvalidOperation:
+        return None, "Hours must be a number."
+    if not hours.is_finite():
+        return None, f"Hours must be between 0 and {MAX_HOURS}."
+    # Rounded as the column stores it, so the rollup and Project_Stats deltas match
+    hours = hours.quantize(CENT, rounding=ROUND_HALF_UP)
+    if hours <= 0 or hours > MAX_HOURS:
+        return None, f"Hours must be between 0 and {MAX_HOURS}."
+    return (emp_no, proj_no, work_date, hours), None
+
+
+def _validated_rows(reader, employees, projects, rejects, counts, deltas, periods):
+    # Generator: valid rows stream straight into the bulk load, bad ones into the error file
+    for line_no, record in enumerate(reader, start=2):
+        values = [(record.get(c) or "").strip() for c in IMPORT_COLUMNS]
+        row, error = _check_import_row(values, employees, projects)
+        if error:
+            rejects.writerow([line_no, *values, error])
+            counts["rejected"] += 1
+            continue
+        hours_rollup.add(deltas, *row)
+        periods.add((row[2].year, row[2].month))
+        counts["loaded"] += 1
+        yield row
+
+
+def _expire_import_errors():
+    # Reject files are kept for download after the import; drop the stale ones
+    cutoff = time.time() - IMPORT_ERROR_MAX_AGE
+    try:
+        with os.scandir(IMPORT_ERROR_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".csv") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+    except FileNotFoundError:
+        pass
+
+
+@bp.route("/import", methods=["GET", "POST"])
+def import_time_entries():
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            return render_template("time_entries/import.html", error="Choose a CSV file to upload.")
+
+        not_utf8 = "The file is not UTF-8 text; save it as CSV UTF-8 and upload it again."
+        reader = csv.DictReader(io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline=""))
+        try:
+            fieldnames = reader.fieldnames or []
+        except UnicodeDecodeError:
+            return render_template("time_entries/import.html", error=not_utf8)
+        missing = [c for c in IMPORT_COLUMNS if c not in fieldnames]
+        if missing:
+            return render_template(
+                "time_entries/import.html",
+                error="Missing column(s): " + ", ".join(missing) + ".",
+            )
+
+        # Reference checks run against sets loaded once, not one query per row
+        employees = set(db.session.execute(select(Employee.Employee_No)).scalars())
+        projects = set(db.session.execute(select(Project.Project_Number)).scalars())
+
+        _expire_import_errors()
+        os.makedirs(IMPORT_ERROR_DIR, exist_ok=True)
+        token = uuid.uuid4().hex
+        error_path = os.path.join(IMPORT_ERROR_DIR, f"{token}.csv")
+        counts = {"loaded": 0, "rejected": 0}
+        deltas = hours_rollup.new_deltas()
+        periods = set()
+        keep = False
+        # COPY runs on the raw DBAPI cursor, so its errors are not wrapped by SQLAlchemy
+        db_errors = (SQLAlchemyError, db.session.get_bind().dialect.loaded_dbapi.Error)
+
+        try:
+            with open(error_path, "w", newline="") as error_file:
+                rejects = csv.writer(error_file)
+                rejects.writerow(["Line", *IMPORT_COLUMNS, "Error"])
+                rows = _validated_rows(reader, employees, projects, rejects, counts, deltas, periods)
+                bulk_load.load_rows(db.session, TimeEntry, IMPORT_COLUMNS, rows, periods)
+
+            # The bulk load bypasses the ORM events that maintain the rollup and Project_Stats
+            hours_rollup.apply_deltas(db.session.connection(), deltas)
+            project_summary.apply_deltas(
+                db.session.connection(),
+                {pn: {"Total_Hours": hours} for pn, hours in hours_rollup.project_hours(deltas).items()},
+            )
+            db.session.commit()
+            keep = counts["rejected"] > 0
+        except UnicodeDecodeError:
+            db.session.rollback()
+            return render_template("time_entries/import.html", error=not_utf8 + " Nothing was imported.")
+        except db_errors:
+            db.session.rollback()
+            current_app.logger.exception("Time entry import failed")
+            return render_template(
+                "time_entries/import.html",
+                error="The import failed in the database; nothing was imported.",
+            )
+        finally:
+            if not keep:
+                os.remove(error_path)
+
+        return render_template("time_entries/import.html", result=counts, token=token if keep else None)
+
+    return render_template("time_entries/import.html")
+
+
+@bp.route("/import/errors/<token>.csv")
+def import_errors(token):
+    if not re.fullmatch(r"[0-9a-f]{32}", token):
+        abort(404)
+    path = os.path.join(IMPORT_ERROR_DIR, f"{token}.csv")
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype="text/csv", as_attachment=True, download_name="time_entry_rejects.csv")
+
+
+@bp.route("/batch", methods=["POST"])
+def batch_time_entries():
+    """JSON API: insert many time entries in one transaction.
+
+    Body is a list of {Employee_No, Project_Number, Work_Date, Hours} objects
+    (or {"entries": [...]}). By default any invalid item rejects the whole
+    batch with 422; with ?mode=partial the valid items are still inserted.
+    """
+    payload = request.get_json(silent=True)
+    entries = payload.get("entries") if isinstance(payload, dict) else payload
+    if not isinstance(entries, list) or not entries:
+        return jsonify(error="Expected a non-empty JSON list of time entries."), 400
+    if len(entries) > MAX_BATCH:
+        return jsonify(error=f"At most {MAX_BATCH} entries per request."), 413
+    partial = request.args.get("mode") == "partial"
+
+    def field(item, name):
+        value = item.get(name) if isinstance(item, dict) else None
+        return "" if value is None else str(value).strip()
+
+    values = [[field(item, c) for c in IMPORT_COLUMNS] for item in entries]
+
+    # Only the referenced employees/projects, in two queries for the whole batch
+    emp_ids = {int(v[0]) for v in values if _is_number(v[0])}
+    proj_ids = {int(v[1]) for v in values if _is_number(v[1])}
+    employees = set(db.session.execute(select(Employee.Employee_No).where(Employee.Employee_No.in_(emp_ids))).scalars())
+    projects = set(db.session.execute(select(Project.Project_Number).where(Project.Project_Number.in_(proj_ids))).scalars())
+
+    results = []
+    rows = []
+    for index, item_values in enumerate(values):
+        row, error = _check_import_row(item_values, employees, projects)
+        if error:
+            results.append({"index": index, "error": error})
+        else:
+            results.append({"index": index})
+            rows.append((index, dict(zip(IMPORT_COLUMNS, row))))
+
+    errors = [r for r in results if "error" in r]
+    if errors and not partial:
+        return jsonify(inserted=0, rejected=len(errors), errors=errors), 422
+
+    if rows:
+        # executemany + insertmanyvalues: one multi-row INSERT ... RETURNING,
+        # with ids handed back in parameter order
+        stmt = insert(TimeEntry).returning(TimeEntry.Time_Entry_ID, sort_by_parameter_order=True)
+        periods = {(params["Work_Date"].year, params["Work_Date"].month) for _, params in rows}
+        ids = db.session.execute(
+            stmt, [params for _, params in rows], execution_options={"cache_periods": periods}
+        ).scalars().all()
+        for (index, _), new_id in zip(rows, ids):
+            results[index]["Time_Entry_ID"] = new_id
+
+        # Bulk inserts skip the ORM events that maintain the rollup and Project_Stats
+        deltas = hours_rollup.new_deltas()
+        for _, params in rows:
+            hours_rollup.add(deltas, *(params[c] for c in IMPORT_COLUMNS))
+        hours_rollup.apply_deltas(db.session.connection(), deltas)
+        project_summary.apply_deltas(
+            db.session.connection(),
+            {pn: {"Total_Hours": hours} for pn, hours in hours_rollup.project_hours(deltas).items()},
+        )
+        db.session.commit()
+
+    return jsonify(inserted=len(rows), rejected=len(errors), results=results), 201 if rows else 422
 
 
 @bp.route("/create", methods=["GET", "POST"])
 def create_time_entry():
-    employees = Employee.query.order_by(Employee.Employee_Name).all()
-    projects = Project.query.order_by(Project.Project_Number).all()
-
     if request.method == "POST":
         emp_no = request.form.get("Employee_No")
         proj_no = request.form.get("Project_Number")
@@ -31,8 +310,6 @@ def create_time_entry():
         if not emp_no or not proj_no or not work_date_str or not hours_str:
             return render_template(
                 "time_entries/create.html",
-                employees=employees,
-                projects=projects,
                 error="Employee, project, work date, and hours are required.",
             )
 
@@ -41,8 +318,6 @@ def create_time_entry():
         except ValueError:
             return render_template(
                 "time_entries/create.html",
-                employees=employees,
-                projects=projects,
                 error="Work date must be YYYY-MM-DD.",
             )
 
@@ -56,15 +331,12 @@ def create_time_entry():
         db.session.commit()
         return redirect(url_for("time_entries.list_time_entries"))
 
-    return render_template("time_entries/create.html", employees=employees, projects=projects)
+    return render_template("time_entries/create.html")
 
 
 @bp.route("/<int:time_entry_id>/edit", methods=["GET", "POST"])
 def edit_time_entry(time_entry_id):
     te = TimeEntry.query.get_or_404(time_entry_id)
-    employees = Employee.query.order_by(Employee.Employee_Name).all()
-    projects = Project.query.order_by(Project.Project_Number).all()
-
     if request.method == "POST":
         emp_no = request.form.get("Employee_No")
         proj_no = request.form.get("Project_Number")
@@ -75,8 +347,8 @@ def edit_time_entry(time_entry_id):
             return render_template(
                 "time_entries/edit.html",
                 te=te,
-                employees=employees,
-                projects=projects,
+                employee_label=employee_label(te.Employee_No),
+                project_label=project_label(te.Project_Number),
                 error="All fields are required.",
             )
 
@@ -86,8 +358,8 @@ def edit_time_entry(time_entry_id):
             return render_template(
                 "time_entries/edit.html",
                 te=te,
-                employees=employees,
-                projects=projects,
+                employee_label=employee_label(te.Employee_No),
+                project_label=project_label(te.Project_Number),
                 error="Work date must be YYYY-MM-DD.",
             )
 
@@ -99,7 +371,12 @@ def edit_time_entry(time_entry_id):
         db.session.commit()
         return redirect(url_for("time_entries.list_time_entries"))
 
-    return render_template("time_entries/edit.html", te=te, employees=employees, projects=projects)
+    return render_template(
+        "time_entries/edit.html",
+        te=te,
+        employee_label=employee_label(te.Employee_No),
+        project_label=project_label(te.Project_Number),
+    )
 
 
 @bp.route("/<int:time_entry_id>/delete", methods=["POST"])
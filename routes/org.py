@@ -0,0 +1,27 @@
+# routes/org.py
+from flask import Blueprint, jsonify, render_template
+from models import db
+from conditional import etag
+from replicas import read_replica
+import cache
+from org_summary import ORG_TABLES, compute_tree
+
+bp = Blueprint("org", __name__, url_prefix="/org")
+
+
+def _tree():
+    return cache.cached("org_tree", ORG_TABLES, lambda: compute_tree(db.session.connection()))
+
+
+@bp.route("/")
+@read_replica
+@etag(ORG_TABLES)
+def tree():
+    return render_template("org/tree.html", tree=_tree())
+
+
+@bp.route("/tree.json")
+@read_replica
+@etag(ORG_TABLES)
+def tree_json():
+    return jsonify(_tree())
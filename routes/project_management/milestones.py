@@ -1,12 +1,16 @@
 from flask import Blueprint, render_template, request, redirect, url_for
 from datetime import datetime
 from models import db, Project, ProjectMilestone
+from conditional import etag
+from replicas import read_replica
 
 bp = Blueprint("milestones", __name__, url_prefix="/projects")
 
 STATUSES = ["Not Started", "In Progress", "Completed"]
 
 @bp.route("/<int:project_number>/milestones")
+@read_replica
+@etag(["Project", "Project_Milestone"])
 def list_milestones(project_number):
     project = Project.query.get_or_404(project_number)
     milestones = (
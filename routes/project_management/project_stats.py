@@ -1,49 +1,107 @@
-from flask import Blueprint, render_template
-from sqlalchemy import func
-from models import db, Project, Employee, Works_On, TimeEntry, ProjectMilestone
+import click
+from flask import Blueprint, render_template, request, abort
+from models import db, Project, ProjectStats
+from conditional import etag
+from replicas import read_replica
+import cache
+import project_summary
 
-bp = Blueprint("project_stats", __name__, url_prefix="/projects")
+bp = Blueprint("project_stats", __name__, url_prefix="/projects", cli_group="project-stats")
+
+PORTFOLIO_TABLES = ["Project", "Employee", "Works_On", "Time_Entry", "Time_Entry_Rollup", "Project_Milestone"]
+PORTFOLIO_SORTS = {
+    "project": "Project_Number",
+    "department": "Department_Name",
+    "team": "Team_Count",
+    "hours": "Total_Hours",
+    "completion": "Completion",
+    "budget": "Budget",
+}
 
 @bp.route("/<int:project_number>/stats")
+@read_replica
+@etag(PORTFOLIO_TABLES)
 def stats(project_number):
-    project = Project.query.get_or_404(project_number)
-
-    # Team count (Works_On)
-    team_count = (
-        db.session.query(func.count(Works_On.Employee_No))
-        .filter(Works_On.Project_Number == project_number)
-        .scalar()
-    ) or 0
-
-    # Total person-hours from TimeEntry (better than Works_On.Time_Spent for “hours” stats)
-    total_hours = (
-        db.session.query(func.coalesce(func.sum(TimeEntry.Hours), 0))
-        .filter(TimeEntry.Project_Number == project_number)
-        .scalar()
+    # Project_Stats is kept current by project_summary, so this is one PK lookup
+    row = (
+        db.session.query(Project, ProjectStats)
+        .outerjoin(ProjectStats, ProjectStats.Project_Number == Project.Project_Number)
+        .filter(Project.Project_Number == project_number)
+        .first()
     )
+    if row is None:
+        abort(404)
+    project, summary = row
 
-    # Milestone counts
-    total_milestones = (
-        db.session.query(func.count(ProjectMilestone.Milestone_ID))
-        .filter(ProjectMilestone.Project_Number == project_number)
-        .scalar()
-    ) or 0
-
-    completed_milestones = (
-        db.session.query(func.count(ProjectMilestone.Milestone_ID))
-        .filter(ProjectMilestone.Project_Number == project_number)
-        .filter(ProjectMilestone.Status == "Completed")
-        .scalar()
-    ) or 0
-
-    remaining_milestones = total_milestones - completed_milestones
+    if summary is None:
+        # Projects created before the summary table existed (or by a bulk load)
+        project_summary.refresh_projects(db.session.connection(), [project_number])
+        db.session.commit()
+        summary = db.session.get(ProjectStats, project_number)
 
     return render_template(
         "projects/stats.html",
         project=project,
-        team_count=team_count,
-        total_hours=total_hours,
-        total_milestones=total_milestones,
-        completed_milestones=completed_milestones,
-        remaining_milestones=remaining_milestones,
+        team_count=summary.Team_Count,
+        total_hours=summary.Total_Hours,
+        total_milestones=summary.Total_Milestones,
+        completed_milestones=summary.Completed_Milestones,
+        remaining_milestones=summary.Total_Milestones - summary.Completed_Milestones,
+    )
+
+
+@bp.route("/portfolio")
+@read_replica
+@etag(PORTFOLIO_TABLES)
+def portfolio():
+    department = request.args.get("department") or None
+    sort = request.args.get("sort", "project")
+    if sort not in PORTFOLIO_SORTS:
+        sort = "project"
+    descending = request.args.get("dir") == "desc"
+
+    rows = cache.cached(
+        "project_portfolio",
+        PORTFOLIO_TABLES,
+        lambda: project_summary.compute_portfolio(db.session.connection()),
+    )
+    departments = sorted({r["Department_Name"] for r in rows})
+
+    if department:
+        rows = [r for r in rows if r["Department_Name"] == department]
+
+    # Missing values (no budget, no milestones) always sort last
+    key = PORTFOLIO_SORTS[sort]
+    present = [r for r in rows if r[key] is not None]
+    missing = [r for r in rows if r[key] is None]
+    rows = sorted(present, key=lambda r: r[key], reverse=descending) + missing
+
+    return render_template(
+        "projects/portfolio.html",
+        rows=rows,
+        departments=departments,
+        department=department,
+        sort=sort,
+        descending=descending,
     )
+
+
+@bp.cli.command("rebuild")
+def rebuild():
+    """Recompute Project_Stats for every project from the base tables."""
+    with db.engine.begin() as conn:
+        count = project_summary.rebuild(conn)
+    click.echo(f"Rebuilt stats for {count} projects.")
+
+
+@bp.cli.command("check")
+def check():
+    """Compare Project_Stats with the base tables; exits 1 on drift."""
+    with db.engine.connect() as conn:
+        drift = project_summary.check(conn)
+    for pn, (stored, expected) in sorted(drift.items()):
+        click.echo(f"Project {pn}: stored={stored} expected={expected}")
+    if drift:
+        click.echo(f"{len(drift)} projects drifted; run 'flask project-stats rebuild'.")
+        raise SystemExit(1)
+    click.echo("Project_Stats is consistent.")
@@ -1,12 +1,20 @@
 # routes/projects.py
 from flask import Blueprint, render_template, request, redirect, url_for
 from models import db, Project, Department, Employee, Works_On, TimeEntry, ProjectMilestone
+from conditional import etag
+from replicas import read_replica
+import cache
+import hours_rollup
+import project_team
+from routes.search import employee_label
 from datetime import datetime
 
 bp = Blueprint("projects", __name__, url_prefix="/projects")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Project", "Department", "Employee"])
 def list_projects():
     projects = (
         db.session.query(Project, Department, Employee)
@@ -20,8 +28,7 @@ def list_projects():
 
 @bp.route("/create", methods=["GET", "POST"])
 def create_project():
-    departments = Department.query.order_by(Department.Department_Name).all()
-    employees = Employee.query.order_by(Employee.Employee_Name).all()
+    departments = cache.reference(Department, Department.Department_Name)
 
     if request.method == "POST":
         proj_no_str = request.form.get("Project_Number", "").strip()
@@ -36,7 +43,6 @@ def create_project():
             return render_template(
                 "projects/create.html",
                 departments=departments,
-                employees=employees,
                 error="Project number, department, and manager are required.",
             )
 
@@ -46,7 +52,6 @@ def create_project():
             return render_template(
                 "projects/create.html",
                 departments=departments,
-                employees=employees,
                 error="Project number must be an integer.",
             )
 
@@ -54,7 +59,6 @@ def create_project():
             return render_template(
                 "projects/create.html",
                 departments=departments,
-                employees=employees,
                 error="A project with that number already exists.",
             )
 
@@ -67,7 +71,6 @@ def create_project():
                 return render_template(
                     "projects/create.html",
                     departments=departments,
-                    employees=employees,
                     error="Invalid start date.",
                 )
         if end_date_str:
@@ -77,47 +80,48 @@ def create_project():
                 return render_template(
                     "projects/create.html",
                     departments=departments,
-                    employees=employees,
                     error="Invalid end date.",
                 )
 
+        try:
+            manager_emp_no = int(manager_emp_no)
+            team = _team_numbers(team) | {manager_emp_no}
+        except ValueError:
+            return render_template(
+                "projects/create.html",
+                departments=departments,
+                error="Employee numbers must be integers.",
+            )
+        unknown = project_team.unknown_employees(db.session, team)
+        if unknown:
+            return render_template(
+                "projects/create.html",
+                departments=departments,
+                error=f"Unknown employee numbers: {', '.join(map(str, unknown))}.",
+            )
+
         project = Project(
             Project_Number=proj_no,
             Budget=budget or None,
             Date_Started=start_date,
             Date_Ended=end_date,
             Department_Name=dept_name,
-            Manager_Emp_No=int(manager_emp_no),
+            Manager_Emp_No=manager_emp_no,
         )
         db.session.add(project)
-        db.session.commit()
-
-        if str(manager_emp_no) not in team:
-            team.append(str(manager_emp_no))
-
-        for emp_no_str in team:
-            wo = Works_On(
-                Employee_No=int(emp_no_str),
-                Project_Number=project.Project_Number,
-                Time_Spent=None,
-                Role=None
-            )
-            existing = Works_On.query.get((wo.Employee_No, wo.Project_Number))
-            if not existing:
-                db.session.add(wo)
-
+        db.session.flush()
+        project_team.set_team(db.session, proj_no, team)
         db.session.commit()
 
         return redirect(url_for("projects.list_projects"))
 
-    return render_template("projects/create.html", departments=departments, employees=employees)
+    return render_template("projects/create.html", departments=departments)
 
 
 @bp.route("/<int:project_number>/edit", methods=["GET", "POST"])
 def edit_project(project_number):
     proj = Project.query.get_or_404(project_number)
-    departments = Department.query.order_by(Department.Department_Name).all()
-    employees = Employee.query.order_by(Employee.Employee_Name).all()
+    departments = cache.reference(Department, Department.Department_Name)
 
     if request.method == "POST":
         budget = request.form.get("Budget", "").strip()
@@ -131,7 +135,7 @@ def edit_project(project_number):
                 "projects/edit.html",
                 project=proj,
                 departments=departments,
-                employees=employees,
+                manager_label=employee_label(proj.Manager_Emp_No),
                 error="Department and manager are required.",
             )
 
@@ -145,7 +149,7 @@ def edit_project(project_number):
                     "projects/edit.html",
                     project=proj,
                     departments=departments,
-                    employees=employees,
+                    manager_label=employee_label(proj.Manager_Emp_No),
                     error="Invalid start date.",
                 )
         if end_date_str:
@@ -156,7 +160,7 @@ def edit_project(project_number):
                     "projects/edit.html",
                     project=proj,
                     departments=departments,
-                    employees=employees,
+                    manager_label=employee_label(proj.Manager_Emp_No),
                     error="Invalid end date.",
                 )
 
@@ -173,10 +177,56 @@ def edit_project(project_number):
         "projects/edit.html",
         project=proj,
         departments=departments,
-        employees=employees,
+        manager_label=employee_label(proj.Manager_Emp_No),
     )
 
 
+def _team_numbers(values, pasted=""):
+    # Picker values plus numbers pasted as free text (commas, spaces or newlines)
+    return {int(value) for value in list(values) + pasted.replace(",", " ").split()}
+
+
+@bp.route("/<int:project_number>/team", methods=["GET", "POST"])
+def edit_team(project_number):
+    proj = Project.query.get_or_404(project_number)
+    members = (
+        db.session.query(Employee.Employee_No, Employee.Employee_Name)
+        .join(Works_On, Works_On.Employee_No == Employee.Employee_No)
+        .filter(Works_On.Project_Number == project_number)
+        .order_by(Employee.Employee_Name)
+        .all()
+    )
+
+    def form(error=None):
+        return render_template(
+            "projects/team.html",
+            project=proj,
+            selected=[(no, employee_label(no, name)) for no, name in members],
+            error=error,
+        )
+
+    if request.method == "POST":
+        try:
+            team = _team_numbers(
+                request.form.getlist("Team_Employee_Nos"),
+                request.form.get("Team_Paste", ""),
+            )
+        except ValueError:
+            return form("Employee numbers must be integers.")
+
+        # The manager always stays on the team, as on project creation
+        team.add(proj.Manager_Emp_No)
+        unknown = project_team.unknown_employees(db.session, team)
+        if unknown:
+            return form(f"Unknown employee numbers: {', '.join(map(str, unknown))}.")
+
+        project_team.set_team(db.session, project_number, team)
+        db.session.commit()
+        return redirect(url_for("projects.list_projects"))
+
+    return form()
+
+
 @bp.route("/<int:project_number>/delete", methods=["POST"])
 def delete_project(project_number):
     proj = Project.query.get_or_404(project_number)
@@ -184,6 +234,7 @@ def delete_project(project_number):
     # Delete dependent rows first to avoid FK constraint errors
     Works_On.query.filter_by(Project_Number=project_number).delete()
     TimeEntry.query.filter_by(Project_Number=project_number).delete()
+    hours_rollup.delete_rows(db.session.connection(), project_numbers=[project_number])
     ProjectMilestone.query.filter_by(Project_Number=project_number).delete()
 
     db.session.delete(proj)
@@ -0,0 +1,37 @@
+# routes/reports.py
+from datetime import date
+from flask import Blueprint, jsonify, redirect, render_template, request, url_for
+from replicas import read_replica
+from labor_cost import build_report, first_year
+
+bp = Blueprint("reports", __name__, url_prefix="/reports")
+
+
+def _years():
+    # (requested year, first year with data, this year); the request is only
+    # valid within that range, so a report never walks back beyond the data
+    this_year = date.today().year
+    first = min(first_year() or this_year, this_year)
+    return request.args.get("year", this_year, type=int), first, this_year
+
+
+@bp.route("/labor-cost")
+@read_replica
+def labor_cost():
+    year, first, this_year = _years()
+    if not first <= year <= this_year:
+        return redirect(url_for("reports.labor_cost", year=min(max(year, first), this_year)))
+    return render_template(
+        "reports/labor_cost.html",
+        report=build_report(year, first=first),
+        years=list(range(this_year, first - 1, -1)),
+    )
+
+
+@bp.route("/labor-cost.json")
+@read_replica
+def labor_cost_json():
+    year, first, this_year = _years()
+    if not first <= year <= this_year:
+        return jsonify(error=f"year must be between {first} and {this_year}."), 400
+    return jsonify(build_report(year, first=first))
@@ -1,11 +1,16 @@
 # routes/rooms.py
 from flask import Blueprint, render_template, request, redirect, url_for
 from models import db, Room, Building, Department
+from conditional import etag
+from replicas import read_replica
+import cache
 
 bp = Blueprint("rooms", __name__, url_prefix="/rooms")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Room", "Building", "Department"])
 def list_rooms():
     rooms = (
         db.session.query(Room, Building, Department)
@@ -19,8 +24,8 @@ def list_rooms():
 
 @bp.route("/create", methods=["GET", "POST"])
 def create_room():
-    buildings = Building.query.order_by(Building.Building_Code).all()
-    departments = Department.query.order_by(Department.Department_Name).all()
+    buildings = cache.reference(Building, Building.Building_Code)
+    departments = cache.reference(Department, Department.Department_Name)
 
     if request.method == "POST":
         number = request.form.get("Room_Number", "").strip()
@@ -63,8 +68,8 @@ def create_room():
 @bp.route("/<room_number>/edit", methods=["GET", "POST"])
 def edit_room(room_number):
     room = Room.query.get_or_404(room_number)
-    buildings = Building.query.order_by(Building.Building_Code).all()
-    departments = Department.query.order_by(Department.Department_Name).all()
+    buildings = cache.reference(Building, Building.Building_Code)
+    departments = cache.reference(Department, Department.Department_Name)
 
     if request.method == "POST":
         sq = request.form.get("Square_Feet", "").strip()
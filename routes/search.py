@@ -0,0 +1,142 @@
+# routes/search.py
+# JSON typeahead endpoints for the employee and project pickers on the forms
+# (static/js/typeahead.js), so no page has to render every row as an <option>.
+#
+# Name matches try a prefix first and fill up with substring matches; both
+# are index-backed (ix_employee_name_trgm on Postgres, ix_employee_name_nocase
+# on SQLite, where substring matches scan the covering index). Digits match
+# numbers by prefix as a handful of primary-key ranges: "12" is 12, 120-129,
+# 1200-1299, and so on.
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, or_, select
+
+from models import db, Employee, Project, Department
+from replicas import read_replica
+
+bp = Blueprint("search", __name__, url_prefix="/api/search")
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+MAX_NUMBER = 2**31 - 1  # Integer columns
+MIN_SUBSTRING = 3  # shorter substrings would match (and scan) nearly everything
+
+
+def employee_label(employee_no, name=None):
+    # Display text for a picked employee; also used to pre-fill edit forms
+    if name is None:
+        emp = db.session.get(Employee, employee_no) if employee_no is not None else None
+        if emp is None:
+            return ""
+        name = emp.Employee_Name
+    return f"{name} (#{employee_no})"
+
+
+def project_label(project_number, department=None):
+    if department is None:
+        proj = db.session.get(Project, project_number) if project_number is not None else None
+        if proj is None:
+            return ""
+        department = proj.Department_Name
+    return f"#{project_number} ({department})"
+
+
+def _args():
+    q = (request.args.get("q") or "").strip()
+    limit = min(max(request.args.get("limit", DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+    return q, limit
+
+
+def _escape(q):
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like(column, pattern):
+    # SQLite's LIKE is already case-insensitive and can use a NOCASE index;
+    # lower() on both sides (SQLAlchemy's ilike there) would rule the index out.
+    if db.session.get_bind().dialect.name == "sqlite":
+        return column.like(pattern, escape="\\")
+    return column.ilike(pattern, escape="\\")
+
+
+def _name_order(column):
+    if db.session.get_bind().dialect.name == "sqlite":
+        return column.collate("NOCASE")
+    return column
+
+
+def _number_prefix(column, digits):
+    if digits.startswith("0"):
+        return None
+    value, scale, ranges = int(digits), 1, []
+    while value * scale <= MAX_NUMBER:
+        ranges.append(and_(column >= value * scale, column < (value + 1) * scale))
+        scale *= 10
+    return or_(*ranges) if ranges else None
+
+
+def _name_matches(stmt, column, q, limit, exclude):
+    # Prefix matches first, then substring matches to fill the page
+    rows = db.session.execute(
+        stmt.where(_like(column, _escape(q) + "%")).order_by(_name_order(column)).limit(limit)
+    ).all()
+    if len(rows) < limit and len(q) >= MIN_SUBSTRING:
+        seen = exclude | {r[0] for r in rows}
+        more = stmt.where(_like(column, "%" + _escape(q) + "%")).order_by(_name_order(column))
+        rows += [r for r in db.session.execute(more.limit(limit + len(seen))).all() if r[0] not in seen]
+    return rows
+
+
+@bp.route("/employees")
+@read_replica
+def employees():
+    q, limit = _args()
+    if not q:
+        return jsonify(results=[])
+
+    stmt = select(Employee.Employee_No, Employee.Employee_Name)
+    rows = []
+    if q.isascii() and q.isdigit():  # isdigit() alone also accepts "²", which int() rejects
+        by_number = _number_prefix(Employee.Employee_No, q)
+        if by_number is not None:
+            rows = db.session.execute(stmt.where(by_number).order_by(Employee.Employee_No).limit(limit)).all()
+    if len(rows) < limit:
+        rows += _name_matches(stmt, Employee.Employee_Name, q, limit - len(rows), {r[0] for r in rows})
+
+    return jsonify(results=[
+        {"id": emp_no, "label": employee_label(emp_no, name)} for emp_no, name in rows[:limit]
+    ])
+
+
+@bp.route("/projects")
+@read_replica
+def projects():
+    q, limit = _args()
+    if not q:
+        return jsonify(results=[])
+
+    stmt = select(Project.Project_Number, Project.Department_Name)
+    rows = []
+    if q.isascii() and q.isdigit():
+        by_number = _number_prefix(Project.Project_Number, q)
+        if by_number is not None:
+            rows = db.session.execute(stmt.where(by_number).order_by(Project.Project_Number).limit(limit)).all()
+    if len(rows) < limit:
+        # Projects have no name of their own: match their department's name.
+        # Department is small; ix_project_department does the rest.
+        departments = [
+            name for (name,) in _name_matches(
+                select(Department.Department_Name), Department.Department_Name, q, MAX_LIMIT, set()
+            )
+        ]
+        if departments:
+            seen = {r[0] for r in rows}
+            more = db.session.execute(
+                stmt.where(Project.Department_Name.in_(departments))
+                .order_by(Project.Department_Name, Project.Project_Number)
+                .limit(limit + len(seen))
+            ).all()
+            rows += [r for r in more if r[0] not in seen]
+
+    return jsonify(results=[
+        {"id": pn, "label": project_label(pn, dept)} for pn, dept in rows[:limit]
+    ])
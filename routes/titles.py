@@ -1,11 +1,15 @@
 # routes/titles.py
 from flask import Blueprint, render_template, request, redirect, url_for
 from models import db, Employee_Title
+from conditional import etag
+from replicas import read_replica
 
 bp = Blueprint("titles", __name__, url_prefix="/titles")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Employee_Title"])
 def list_titles():
     titles = Employee_Title.query.order_by(Employee_Title.Title).all()
     return render_template("titles/list.html", titles=titles)
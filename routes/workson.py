@@ -1,27 +1,28 @@
 # routes/workson.py
 from flask import Blueprint, render_template, request, redirect, url_for
 from models import db, Works_On, Employee, Project
+from conditional import etag
+from replicas import read_replica
+from streaming import render_rows
 
 bp = Blueprint("workson", __name__, url_prefix="/workson")
 
 
 @bp.route("/")
+@read_replica
+@etag(["Works_On", "Employee", "Project"])
 def list_workson():
     rows = (
         db.session.query(Works_On, Employee, Project)
         .join(Employee, Works_On.Employee_No == Employee.Employee_No)
         .join(Project, Works_On.Project_Number == Project.Project_Number)
         .order_by(Employee.Employee_Name, Project.Project_Number)
-        .all()
     )
-    return render_template("workson/list.html", rows=rows)
+    return render_rows("workson/list.html", rows)
 
 
 @bp.route("/create", methods=["GET", "POST"])
 def create_workson():
-    employees = Employee.query.order_by(Employee.Employee_Name).all()
-    projects = Project.query.order_by(Project.Project_Number).all()
-
     if request.method == "POST":
         emp_no = request.form.get("Employee_No")
         proj_no = request.form.get("Project_Number")
@@ -31,8 +32,6 @@ def create_workson():
         if not emp_no or not proj_no:
             return render_template(
                 "workson/create.html",
-                employees=employees,
-                projects=projects,
                 error="Employee and project are required.",
             )
 
@@ -40,8 +39,6 @@ def create_workson():
         if existing:
             return render_template(
                 "workson/create.html",
-                employees=employees,
-                projects=projects,
                 error="This employee is already assigned to that project.",
             )
 
@@ -57,8 +54,6 @@ def create_workson():
 
     return render_template(
         "workson/create.html",
-        employees=employees,
-        projects=projects,
     )
 
 
@@ -0,0 +1,133 @@
+# schema.py
+# Schema management, run once per deploy (`flask --app app schema upgrade`)
+# instead of in every worker. The upgrade creates missing tables and indexes
+# and stamps Schema_Version with a fingerprint of the models; at boot a worker
+# only reads the stamp and skips DDL when it matches. It also creates upcoming
+# Time_Entry partitions when the table is partitioned (see partitioning.py)
+# and fills Time_Entry_Rollup when it is empty.
+#
+# create_all never adds, drops or alters columns of existing tables, so the
+# fingerprint covers only what the upgrade applies or checks: tables, column
+# names and indexes. An existing table whose columns differ from its model
+# stops the upgrade before the stamp; write that migration by hand.
+import hashlib
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, SchemaVersion
+import cache
+import hours_rollup
+import partitioning
+
+
+class SchemaDriftError(RuntimeError):
+    """Existing tables whose columns no longer match the models."""
+
+
+def schema_version():
+    # Stable hash of every table, column name and index in the models
+    parts = []
+    for name in sorted(db.metadata.tables):
+        table = db.metadata.tables[name]
+        parts.append(name)
+        for col in table.columns:
+            parts.append(f"  {col.name}")
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            cols = ",".join(c.name for c in index.columns)
+            parts.append(f"  ix {index.name} ({cols}) unique={index.unique}")
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def current_stamp(engine):
+    """Version stamped in the database, or None if it was never upgraded."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(SchemaVersion.Version).where(SchemaVersion.Id == 1)).scalar()
+    except SQLAlchemyError:
+        # Schema_Version does not exist yet
+        return None
+
+
+def is_current(engine):
+    return current_stamp(engine) == schema_version()
+
+
+def create_missing_indexes(engine):
+    # db.create_all() only creates missing tables; indexes added to tables
+    # that already exist have to be created separately.
+    with engine.begin() as conn:
+        for table in db.metadata.tables.values():
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def column_drift(engine):
+    """['Table: missing X; unexpected Y', ...] for existing tables whose columns differ from the models."""
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    problems = []
+    for name in sorted(db.metadata.tables):
+        if name not in existing:
+            continue
+        model = {col.name for col in db.metadata.tables[name].columns}
+        actual = {col["name"] for col in inspector.get_columns(name)}
+        details = []
+        if model - actual:
+            details.append("missing " + ", ".join(sorted(model - actual)))
+        if actual - model:
+            details.append("unexpected " + ", ".join(sorted(actual - model)))
+        if details:
+            problems.append(f"{name}: " + "; ".join(details))
+    return problems
+
+
+def upgrade(engine):
+    version = schema_version()
+    if engine.dialect.name == "postgresql":
+        # Trigram operator class for ix_employee_name_trgm
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    db.metadata.create_all(engine)
+    drift = column_drift(engine)
+    if drift:
+        raise SchemaDriftError("Columns differ from the models (not stamped): " + " | ".join(drift))
+    create_missing_indexes(engine)
+    with cache.begin(engine) as conn:
+        # Payroll and project stats read hours only from the rollup; fill it
+        # when it was just created (or never filled) on a database with entries
+        if hours_rollup.is_empty(conn):
+            hours_rollup.rebuild(conn)
+        conn.execute(SchemaVersion.__table__.delete())
+        conn.execute(
+            SchemaVersion.__table__.insert().values(Id=1, Version=version, Applied_At=datetime.utcnow())
+        )
+        # No-op unless Time_Entry has been converted to monthly partitions
+        partitioning.ensure(conn)
+    return version
+
+
+schema_cli = AppGroup("schema", help="Create and upgrade the database schema.")
+
+
+@schema_cli.command("upgrade")
+def upgrade_command():
+    """Create missing tables and indexes and stamp the schema version."""
+    try:
+        version = upgrade(db.engine)
+    except SchemaDriftError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Schema at {version}")
+
+
+@schema_cli.command("status")
+def status_command():
+    """Compare the stamped schema version with the models; exits 1 if stale."""
+    stamp, version = current_stamp(db.engine), schema_version()
+    click.echo(f"Database: {stamp or 'not stamped'}")
+    click.echo(f"Models:   {version}")
+    if stamp != version:
+        raise SystemExit(1)
@@ -0,0 +1,251 @@
+# seed.py
+# Synthetic company generator. Builds a consistent data set across every model
+# (divisions -> departments -> employees, buildings/rooms, projects with teams,
+# hourly contracts, time entries, milestones and optionally payroll history)
+# and bulk-loads it through bulk_load (COPY on Postgres, executemany elsewhere).
+#
+#   flask --app app seed --employees 50000 --projects 5000 --time-entries 20000000
+#
+# Runs are deterministic for a given --rng-seed, so benchmark numbers taken on
+# different commits are comparable.
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import click
+from sqlalchemy import update
+
+import bulk_load
+import cache
+import hours_rollup
+import project_summary
+from models import (
+    db, Division, Department, Building, Room, Employee_Title, Employee, Project,
+    Works_On, ProjectEmployee, TimeEntry, ProjectMilestone,
+)
+from payroll_backfill import parse_period
+from payroll_engine import run_payroll_period
+
+FIRST_NAMES = ["Ava", "Ben", "Chloe", "Dev", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonah",
+               "Kara", "Liam", "Mei", "Noah", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Tariq"]
+LAST_NAMES = ["Adams", "Brown", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jones",
+              "Khan", "Lopez", "Moreau", "Nguyen", "Okafor", "Patel", "Rossi", "Smith", "Tanaka", "Weber"]
+TITLES = [
+    ("Associate", Decimal("4200.00")),
+    ("Analyst", Decimal("5600.00")),
+    ("Engineer", Decimal("7500.00")),
+    ("Senior Engineer", Decimal("9400.00")),
+    ("Manager", Decimal("10800.00")),
+    ("Director", Decimal("14500.00")),
+]
+STATUSES = ["Not Started", "In Progress", "Completed"]
+
+
+def _months(end, count):
+    year, month = end
+    periods = []
+    for _ in range(count):
+        periods.append((year, month))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return list(reversed(periods))
+
+
+def generate(
+    employees=1000,
+    projects=100,
+    time_entries=100000,
+    months=12,
+    end=(2025, 6),
+    divisions=5,
+    departments_per_division=4,
+    hourly_share=0.2,
+    payroll=False,
+    rng_seed=42,
+    echo=print,
+):
+    rng = random.Random(rng_seed)
+    session = db.session
+    periods = _months(end, months)
+    first_day = date(*periods[0], 1)
+    last_day = date(end[0] + (end[1] == 12), end[1] % 12 + 1, 1) - timedelta(days=1)
+    span = (last_day - first_day).days + 1
+
+    if session.get_bind().dialect.name == "sqlite":
+        session.execute(db.text("PRAGMA synchronous = OFF"))
+
+    def load(model, columns, rows):
+        started = time.perf_counter()
+        counter = [0]
+
+        def counted():
+            for row in rows:
+                counter[0] += 1
+                yield row
+
+        bulk_load.load_rows(session, model, columns, counted())
+        echo(f"  {model.__tablename__:<18} {counter[0]:>12,} rows in {time.perf_counter() - started:.1f}s")
+
+    # ---- Organisation ----
+    division_names = [f"Division {d + 1}" for d in range(divisions)]
+    department_names = [
+        (f"{div} / Dept {d + 1}", div)
+        for div in division_names
+        for d in range(departments_per_division)
+    ]
+    load(Division, ["Division_Name", "Head_Emp_No"], ((name, None) for name in division_names))
+    load(
+        Department,
+        ["Department_Name", "Budget", "Division_Name", "Head_Emp_No"],
+        ((name, Decimal(rng.randrange(500, 5000) * 1000), div, None) for name, div in department_names),
+    )
+    load(Employee_Title, ["Title", "Salary"], TITLES)
+
+    buildings = [f"B{b + 1:02d}" for b in range(max(1, len(department_names) // 4))]
+    load(
+        Building,
+        ["Building_Code", "Name", "Year_Bought", "Cost"],
+        ((code, f"Building {code}", rng.randrange(1970, 2024), Decimal(rng.randrange(2, 80) * 1000000)) for code in buildings),
+    )
+
+    def room_rows():
+        for i in range(len(department_names) * 5):
+            building = buildings[i % len(buildings)]
+            yield (
+                f"{building}-{i + 1:04d}",
+                rng.randrange(100, 2500),
+                rng.choice(["Office", "Lab", "Meeting"]),
+                building,
+                department_names[i % len(department_names)][0],
+            )
+
+    load(Room, ["Room_Number", "Square_Feet", "Type", "Building_Code", "Department_Name"], room_rows())
+
+    # ---- People ----
+    emp_department = {}
+
+    def employee_rows():
+        for n in range(1, employees + 1):
+            dept, div = department_names[rng.randrange(len(department_names))]
+            emp_department[n] = dept
+            yield (
+                n,
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}",
+                f"555-{n % 10000:04d}",
+                first_day - timedelta(days=rng.randrange(3650)),
+                rng.choice(TITLES)[0],
+                dept,
+                div,
+            )
+
+    load(
+        Employee,
+        ["Employee_No", "Employee_Name", "Phone_Number", "Starting_Date", "Title", "Department_Name", "Division_Name"],
+        employee_rows(),
+    )
+
+    # First employee of each department/division leads it
+    heads = {}
+    for n, dept in emp_department.items():
+        heads.setdefault(dept, n)
+    for dept, n in heads.items():
+        session.execute(update(Department).where(Department.Department_Name == dept).values(Head_Emp_No=n))
+    for div in division_names:
+        head = next((heads[d] for d, dv in department_names if dv == div and d in heads), None)
+        session.execute(update(Division).where(Division.Division_Name == div).values(Head_Emp_No=head))
+
+    # ---- Projects and teams ----
+    project_rows = []
+    for p in range(1, projects + 1):
+        manager = rng.randrange(1, employees + 1)
+        started = first_day + timedelta(days=rng.randrange(span))
+        project_rows.append((p, Decimal(rng.randrange(50, 2000) * 1000), started, None, emp_department[manager], manager))
+    load(
+        Project,
+        ["Project_Number", "Budget", "Date_Started", "Date_Ended", "Department_Name", "Manager_Emp_No"],
+        project_rows,
+    )
+
+    assignments = {}
+    for n in range(1, employees + 1):
+        assignments[n] = rng.sample(range(1, projects + 1), k=min(projects, rng.randrange(1, 4)))
+    for p, *_, manager in project_rows:
+        if p not in assignments[manager]:
+            assignments[manager].append(p)
+    load(
+        Works_On,
+        ["Employee_No", "Project_Number", "Time_Spent", "Role"],
+        ((n, p, None, rng.choice(["Developer", "Analyst", "Lead", None])) for n, ps in assignments.items() for p in ps),
+    )
+
+    hourly = [n for n in range(1, employees + 1) if rng.random() < hourly_share]
+    load(
+        ProjectEmployee,
+        ["Employee_No", "Project_Number", "Hourly_Rate", "Start_Date", "End_Date"],
+        ((n, assignments[n][0], Decimal(rng.randrange(2500, 12000)) / 100, first_day, None) for n in hourly),
+    )
+
+    # ---- Time entries: spread over the period, always on one of the employee's projects ----
+    def time_entry_rows():
+        for _ in range(time_entries):
+            n = rng.randrange(1, employees + 1)
+            yield (
+                n,
+                rng.choice(assignments[n]),
+                first_day + timedelta(days=rng.randrange(span)),
+                Decimal(rng.randrange(1, 33)) / 4,
+            )
+
+    load(TimeEntry, ["Employee_No", "Project_Number", "Work_Date", "Hours"], time_entry_rows())
+    started = time.perf_counter()
+    rollup_rows = hours_rollup.rebuild(session.connection())
+    echo(f"  {'Time_Entry_Rollup':<18} {rollup_rows:>12,} rows in {time.perf_counter() - started:.1f}s")
+
+    def milestone_rows():
+        for p in range(1, projects + 1):
+            for m in range(rng.randrange(3, 12)):
+                status = rng.choice(STATUSES)
+                due = first_day + timedelta(days=rng.randrange(span))
+                yield (p, f"Milestone {m + 1}", None, status, due, due if status == "Completed" else None)
+
+    load(
+        ProjectMilestone,
+        ["Project_Number", "Title", "Description", "Status", "Due_Date", "Completed_Date"],
+        milestone_rows(),
+    )
+
+    # ---- Derived data ----
+    if payroll:
+        started = time.perf_counter()
+        rows = sum(run_payroll_period(year, month) for year, month in periods)
+        echo(f"  {'Payroll_History':<18} {rows:>12,} rows in {time.perf_counter() - started:.1f}s")
+
+    project_summary.rebuild(session.connection())
+    cache.bump_session(session, db.metadata.tables.keys())
+    session.commit()
+
+
+@click.command("seed")
+@click.option("--employees", default=1000, show_default=True)
+@click.option("--projects", default=100, show_default=True)
+@click.option("--time-entries", default=100000, show_default=True)
+@click.option("--months", default=12, show_default=True, help="Months of history ending at --end.")
+@click.option("--end", default="2025-06", show_default=True, help="Last month (YYYY-MM).")
+@click.option("--hourly-share", default=0.2, show_default=True)
+@click.option("--payroll/--no-payroll", default=False, help="Also run payroll for every month.")
+@click.option("--rng-seed", default=42, show_default=True)
+def seed_command(employees, projects, time_entries, months, end, hourly_share, payroll, rng_seed):
+    """Fill an empty database with a synthetic company."""
+    started = time.perf_counter()
+    generate(
+        employees=employees,
+        projects=projects,
+        time_entries=time_entries,
+        months=months,
+        end=parse_period(end),
+        hourly_share=hourly_share,
+        payroll=payroll,
+        rng_seed=rng_seed,
+        echo=click.echo,
+    )
+    click.echo(f"Seeded in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,143 @@
+// static/js/typeahead.js
+// Search-as-you-type pickers for fields rendered with the typeahead() macro
+// (templates/_typeahead.html). Results come from the /api/search endpoints;
+// the chosen id goes into a hidden input so the form posts the same field
+// the old <select> did.
+(function () {
+  "use strict";
+
+  const DELAY_MS = 150;
+
+  function setup(box) {
+    const url = box.dataset.url;
+    const name = box.dataset.name;
+    const multiple = "multiple" in box.dataset;
+    const input = box.querySelector(".typeahead-input");
+    const list = box.querySelector(".typeahead-results");
+    const hidden = multiple ? null : box.querySelector('input[type="hidden"]');
+    const chosen = multiple ? box.querySelector(".typeahead-chosen") : null;
+    let timer = null;
+    let latest = 0;
+    let active = -1;
+
+    function close() {
+      list.replaceChildren();
+      active = -1;
+    }
+
+    function badge(item) {
+      const span = document.createElement("span");
+      span.className = "badge text-bg-secondary d-inline-flex align-items-center gap-1";
+      span.dataset.id = item.id;
+      span.append(item.label + " ");
+
+      const remove = document.createElement("button");
+      remove.type = "button";
+      remove.className = "btn-close btn-close-white";
+      remove.setAttribute("aria-label", "Remove");
+
+      const value = document.createElement("input");
+      value.type = "hidden";
+      value.name = name;
+      value.value = item.id;
+
+      span.append(remove, value);
+      return span;
+    }
+
+    function choose(item) {
+      if (multiple) {
+        if (!chosen.querySelector(`[data-id="${item.id}"]`)) {
+          chosen.append(badge(item));
+        }
+        input.value = "";
+      } else {
+        hidden.value = item.id;
+        input.value = item.label;
+        input.setCustomValidity("");
+      }
+      close();
+    }
+
+    function render(results) {
+      close();
+      if (!results.length) {
+        const empty = document.createElement("div");
+        empty.className = "list-group-item text-muted";
+        empty.textContent = "No matches";
+        list.append(empty);
+        return;
+      }
+      for (const item of results) {
+        const option = document.createElement("button");
+        option.type = "button";
+        option.className = "list-group-item list-group-item-action";
+        option.textContent = item.label;
+        // mousedown fires before the input's blur closes the list
+        option.addEventListener("mousedown", (event) => {
+          event.preventDefault();
+          choose(item);
+        });
+        option.item = item;
+        list.append(option);
+      }
+    }
+
+    function highlight(index) {
+      const options = list.querySelectorAll("button");
+      if (!options.length) return;
+      active = (index + options.length) % options.length;
+      options.forEach((option, i) => option.classList.toggle("active", i === active));
+    }
+
+    input.addEventListener("input", () => {
+      if (hidden) {
+        hidden.value = "";
+        input.setCustomValidity(input.value ? "Choose an entry from the list." : "");
+      }
+      clearTimeout(timer);
+      const q = input.value.trim();
+      if (!q) {
+        close();
+        return;
+      }
+      timer = setTimeout(() => {
+        const request = ++latest;
+        fetch(`${url}?q=${encodeURIComponent(q)}`)
+          .then((response) => response.json())
+          .then((data) => {
+            // Ignore answers to queries the user has already typed past
+            if (request === latest) render(data.results);
+          });
+      }, DELAY_MS);
+    });
+
+    input.addEventListener("keydown", (event) => {
+      if (event.key === "ArrowDown") {
+        highlight(active + 1);
+      } else if (event.key === "ArrowUp") {
+        highlight(active - 1);
+      } else if (event.key === "Enter" && active >= 0) {
+        choose(list.querySelectorAll("button")[active].item);
+      } else if (event.key === "Escape") {
+        close();
+        return;
+      } else {
+        return;
+      }
+      event.preventDefault();
+    });
+
+    input.addEventListener("blur", close);
+
+    if (chosen) {
+      chosen.addEventListener("click", (event) => {
+        if (event.target.classList.contains("btn-close")) {
+          event.target.closest("[data-id]").remove();
+        }
+      });
+    }
+  }
+
+  document.querySelectorAll(".typeahead").forEach(setup);
+})();
@@ -0,0 +1,69 @@
+# streaming.py
+# Streaming render for unpaginated list pages. Rows are fetched in batches of
+# STREAM_BATCH with yield_per and the template is rendered with Flask's
+# stream_template, so neither the result set nor the page is ever held in
+# memory as a whole and the first bytes go out before the last row is read.
+#
+# Flask tears the app context down (and Flask-SQLAlchemy closes the session)
+# as soon as the view returns, before the body is sent. The query therefore
+# only runs once the template first touches the rows, in the session of the
+# context stream_template re-enters; perf's per-request counts do not include
+# it, and an error mid-stream truncates the page instead of turning it into a
+# 500. Set STREAM_LISTS=0 to fall back to render_template.
+import os
+
+from flask import current_app, render_template, stream_template
+
+STREAM_BATCH = 500
+BUFFER_BYTES = 16 * 1024  # Jinja yields tiny fragments; send them in larger writes
+
+
+class RowStream:
+    """Iterate a query's rows once, in yield_per batches; truthy when there is at least one row."""
+
+    def __init__(self, query, batch=STREAM_BATCH):
+        self._query = query
+        self._batch = batch
+        self._rows = None
+        self._first = None
+
+    def _start(self):
+        if self._rows is None:
+            self._rows = iter(self._query.yield_per(self._batch))
+            self._first = next(self._rows, None)
+
+    def __bool__(self):
+        self._start()
+        return self._first is not None
+
+    def __iter__(self):
+        self._start()
+        if self._first is not None:
+            first, self._first = self._first, None
+            yield first
+        yield from self._rows
+
+
+def _buffered(chunks, size=BUFFER_BYTES):
+    buf, length = [], 0
+    for chunk in chunks:
+        buf.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buf)
+            buf, length = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def render_rows(template, query, name="rows", **context):
+    """render_template(template, name=query.all(), ...), streamed when STREAM_LISTS is on."""
+    if not current_app.config["STREAM_LISTS"]:
+        return render_template(template, **{name: query.all()}, **context)
+    return current_app.response_class(
+        _buffered(stream_template(template, **{name: RowStream(query)}, **context)),
+    )
+
+
+def init_app(app):
+    app.config.setdefault("STREAM_LISTS", os.getenv("STREAM_LISTS", "1") == "1")
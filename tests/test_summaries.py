@@ -0,0 +1,121 @@
+# tests/test_summaries.py
+# Time_Entry_Rollup and Project_Stats are maintained incrementally by ORM
+# events, bulk-load deltas and offboarding. Each test drives one write path
+# through the routes on a seeded SQLite database, then compares both
+# summaries with a full recompute.
+#
+#   python -m pytest -q
+import io
+
+import pytest
+from sqlalchemy import func, select
+
+import hours_rollup
+import project_summary
+import seed
+from benchmarks.common import temp_app
+from models import db, Employee, Project, TimeEntry
+
+
+@pytest.fixture
+def app():
+    with temp_app(routes=True) as app:
+        seed.generate(employees=40, projects=6, time_entries=400, months=3, end=(2025, 6), echo=lambda *a: None)
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def assert_no_drift():
+    db.session.remove()
+    with db.engine.connect() as conn:
+        assert hours_rollup.check(conn) == {}
+        assert project_summary.check(conn) == {}
+
+
+def pick():
+    employee_no = db.session.execute(select(Employee.Employee_No).order_by(Employee.Employee_No.desc())).scalar()
+    projects = db.session.execute(select(Project.Project_Number).order_by(Project.Project_Number)).scalars().all()
+    return employee_no, projects[0], projects[1]
+
+
+def test_seeded_data_is_consistent(app):
+    assert_no_drift()
+
+
+def test_create_edit_delete(client):
+    emp, proj, other_proj = pick()
+    # Hours are rounded to the column's two decimals on the way in
+    form = {"Employee_No": emp, "Project_Number": proj, "Work_Date": "2025-06-03", "Hours": "2.555"}
+    assert client.post("/time-entries/create", data=form).status_code == 302
+    assert_no_drift()
+
+    te_id = db.session.execute(select(func.max(TimeEntry.Time_Entry_ID))).scalar()
+    form = {"Employee_No": emp, "Project_Number": other_proj, "Work_Date": "2025-05-30", "Hours": "7.25"}
+    assert client.post(f"/time-entries/{te_id}/edit", data=form).status_code == 302
+    assert_no_drift()
+
+    assert client.post(f"/time-entries/{te_id}/delete").status_code == 302
+    assert db.session.get(TimeEntry, te_id) is None
+    assert_no_drift()
+
+
+def test_csv_import(client):
+    emp, proj, other_proj = pick()
+    body = (
+        "Employee_No,Project_Number,Work_Date,Hours\n"
+        f"{emp},{proj},2025-06-02,3.5\n"
+        f"{emp},{other_proj},2025-04-30,1.005\n"
+        f"{emp},999999,2025-06-02,2\n"
+        f"{emp},{proj},2025-06-02,25\n"
+    )
+    response = client.post("/time-entries/import", data={"file": (io.BytesIO(body.encode()), "entries.csv")})
+    assert response.status_code == 200
+    assert b"Loaded 2 time entries" in response.data
+    assert b"2 rows were rejected" in response.data
+    assert_no_drift()
+
+
+def test_import_rejects_non_utf8(client):
+    before = db.session.execute(select(func.count()).select_from(TimeEntry)).scalar()
+    body = "Employee_No,Project_Number,Work_Date,Hours\n1,1,2025-06-02,3\n1,1,2025-06-03,\xe9\n".encode("latin-1")
+    response = client.post("/time-entries/import", data={"file": (io.BytesIO(body), "entries.csv")})
+    assert response.status_code == 200
+    assert b"not UTF-8" in response.data
+    assert db.session.execute(select(func.count()).select_from(TimeEntry)).scalar() == before
+    assert_no_drift()
+
+
+def test_batch_insert(client):
+    emp, proj, other_proj = pick()
+    entries = [
+        {"Employee_No": emp, "Project_Number": proj, "Work_Date": "2025-06-04", "Hours": "4"},
+        {"Employee_No": emp, "Project_Number": other_proj, "Work_Date": "2025-06-05", "Hours": 0.333},
+        {"Employee_No": "²", "Project_Number": proj, "Work_Date": "2025-06-05", "Hours": 1},
+    ]
+    response = client.post("/time-entries/batch", json=entries)
+    assert response.status_code == 422
+    assert response.get_json()["inserted"] == 0
+    assert_no_drift()
+
+    response = client.post("/time-entries/batch?mode=partial", json=entries)
+    assert response.status_code == 201
+    assert response.get_json()["inserted"] == 2
+    assert_no_drift()
+
+
+def test_offboard(client):
+    department = db.session.execute(
+        select(Employee.Department_Name).order_by(Employee.Employee_No.desc())
+    ).scalar()
+    response = client.post("/employees/offboard", data={"Department_Name": department})
+    assert response.status_code == 200
+    assert b"deleted" in response.data
+    assert_no_drift()
+
+    emp = db.session.execute(select(Employee.Employee_No).order_by(Employee.Employee_No.desc())).scalar()
+    assert client.post(f"/employees/{emp}/delete").status_code == 302
+    assert_no_drift()